@@ -1,56 +1,20 @@
-import json
-import pandas as pd
-import os
-from flask import Flask, render_template
+import time
+from datetime import date
 
-app = Flask(__name__)
+from flask import Flask, Response, abort, g, jsonify, render_template, request
 
-SUMMARY_PATH = os.path.join("data", "summary.json")
-HISTORY_PATH = os.path.join("data", "ga_cash3_history.csv")
+import dashboard
+import data_store
+import metrics
 
-def load_summary(path):
-    try:
-        with open(path, encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        app.logger.warning("summary.json malformed or unreadable: %s", e)
-        return {}
+app = Flask(__name__)
 
-def load_history(path):
-    try:
-        df = pd.read_csv(path)
-        # Optional: coerce digit columns to int if possible, else leave as-is
-        for col in ["Digit1", "Digit2", "Digit3"]:
-            if col in df.columns:
-                # convert float-ish to int where appropriate, preserve NaN as None
-                df[col] = pd.to_numeric(df[col], errors="coerce").dropna().astype(int)
-        records = df.to_dict(orient="records")
-        return records
-    except Exception as e:
-        app.logger.warning("failed to load history: %s", e)
-        return []
-
-def pick_latest(history):
-    if not history:
-        return None
-    try:
-        df = pd.DataFrame(history)
-        # Parse date if possible; fall back to list order
-        if "Date" in df.columns:
-            df["__parsed_date"] = pd.to_datetime(df["Date"], errors="coerce")
-            # If Draw exists, sort secondary
-            sort_keys = ["__parsed_date"]
-            if "Draw" in df.columns:
-                sort_keys.append("Draw")
-            df = df.sort_values(by=sort_keys, ascending=[False] * len(sort_keys))
-            latest_row = df.iloc[0].to_dict()
-        else:
-            latest_row = history[-1]
-        # Clean internal helper column
-        latest_row.pop("__parsed_date", None)
-        return latest_row
-    except Exception:
-        return history[-1]
+REQUEST_SECONDS = metrics.histogram("cash3_http_request_seconds", "Flask request handling time")
+
+# Draws shown on the dashboard; the rest is paginated under /history.
+RECENT_DRAWS = 20
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
 def normalize_predictions(summary):
     preds = summary.get("predictions", {})
@@ -69,21 +33,134 @@ def normalize_predictions(summary):
         "uncommon": ensure_digits(uncommon),
     }
 
-@app.route("/")
-def index():
-    summary = load_summary(SUMMARY_PATH)
-    history = load_history(HISTORY_PATH)
-    latest = pick_latest(history)
+def dashboard_context():
+    # Copy: the cached summary is shared across requests.
+    summary = dict(data_store.get_summary())
+    history = data_store.get_history()
     predictions = normalize_predictions(summary)
 
     # Ensure top-level fallback fields exist
-    summary.setdefault("total_draws", len(history))
+    summary.setdefault("total_draws", history.total_draws)
+    # summary.json holds every slot's prediction; show the one for the draw that is next right now.
+    summary["next_draw"] = data_store.next_draw(summary)
+    summary.pop("next_draws", None)
     # Optionally format last_updated if it's a datetime string — leave as-is for template.
 
+    return {
+        "summary": summary,
+        "history": history.recent(RECENT_DRAWS),
+        "latest": history.latest,
+        "predictions": predictions,
+    }
+
+def json_bundles(context):
+    """Payloads of /api/summary, /api/latest and /api/predictions."""
+    summary = context["summary"]
+    return {
+        "summary": summary,
+        "latest": {"latest": context["latest"], "recent": context["history"]},
+        "predictions": {
+            "predictions": context["predictions"],
+            "horizons": summary.get("horizons", {}),
+            "next_draw": summary.get("next_draw", {}),
+        },
+    }
+
+@app.route("/")
+def index():
+    # Pre-rendered by dashboard.publish() after each data update; render live until then.
+    response = dashboard.send("index.html")
+    if response is not None:
+        return response
+    return render_template("index.html", **dashboard_context())
+
+@app.route("/api/<any(summary, latest, predictions):bundle>")
+def api_bundle(bundle):
+    response = dashboard.send(f"{bundle}.json")
+    if response is not None:
+        return response
+    return jsonify(json_bundles(dashboard_context())[bundle])
+
+def history_filters(args):
+    """Validated draw/from/to filters from query args; aborts with 400 on bad input."""
+    draw = args.get("draw") or None
+    if draw is not None and draw not in data_store.DRAW_ORDER:
+        abort(400, description=f"unknown draw {draw!r}")
+    bounds = {}
+    for key in ("from", "to"):
+        value = args.get(key) or None
+        if value is not None:
+            try:
+                value = date.fromisoformat(value).isoformat()
+            except ValueError:
+                abort(400, description=f"{key!r} must be an ISO date (YYYY-MM-DD)")
+        bounds[key] = value
+    return {"draw": draw, "start": bounds["from"], "end": bounds["to"]}
+
+def int_arg(args, key, default, minimum, maximum=None):
+    try:
+        value = int(args.get(key, default))
+    except ValueError:
+        abort(400, description=f"{key!r} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        abort(400, description=f"{key!r} out of range")
+    return value
+
+@app.route("/history")
+def history_page():
+    filters = history_filters(request.args)
+    page = int_arg(request.args, "page", 1, 1)
+    rows, total = data_store.get_history().query(
+        offset=(page - 1) * PAGE_SIZE, limit=PAGE_SIZE, **filters
+    )
+    pages = max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
     return render_template(
-        "index.html",
-        summary=summary,
-        history=history,
-        latest=latest,
-        predictions=predictions,
+        "history.html",
+        rows=rows,
+        total=total,
+        page=page,
+        pages=pages,
+        filters=filters,
     )
+
+@app.route("/api/history")
+def api_history():
+    filters = history_filters(request.args)
+    offset = int_arg(request.args, "offset", 0, 0)
+    limit = int_arg(request.args, "limit", PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    rows, total = data_store.get_history().query(offset=offset, limit=limit, **filters)
+    return jsonify({
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "draws": rows,
+    })
+
+@app.errorhandler(400)
+def bad_request(e):
+    if request.path.startswith("/api/"):
+        return jsonify({"error": e.description}), 400
+    return e
+
+@app.before_request
+def start_timer():
+    if metrics.ENABLED:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=request.endpoint or "unknown", method=request.method, status=response.status_code,
+        )
+    return response
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/cache")
+def cache():
+    return jsonify(data_store.cache_stats())
@@ -0,0 +1,131 @@
+# async_fetch.py
+"""
+Concurrent result fetching. Every Source is fetched over one pooled
+aiohttp session; retries back off with asyncio.sleep so they never block
+the other sources, and the first source to return usable rows wins while
+the rest are cancelled.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import aiohttp
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.1 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+]
+
+
+FETCH_SECONDS = metrics.histogram("cash3_fetch_seconds", "Fetch and parse time per source over all attempts, by outcome")
+
+
+class FetchError(Exception):
+    pass
+
+
+@dataclass
+class Source:
+    name: str
+    url: str
+    parse: Callable[[bytes], list[dict]]
+    timeout: float = 15.0  # budget for all attempts against this source
+    attempts: int = 3
+    backoff: float = 1.0  # seconds before the 2nd attempt; doubles after that
+    cpu_bound: bool = False  # parse in a worker thread so the loop stays responsive
+
+
+async def fetch_source(session: aiohttp.ClientSession, source: Source) -> list[dict]:
+    """Fetches and parses one source, rotating user agents between attempts."""
+    start, outcome = time.perf_counter(), "error"
+    try:
+        rows = await _fetch_source(session, source)
+        outcome = "ok"
+        return rows
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        FETCH_SECONDS.observe(time.perf_counter() - start, source=source.name, outcome=outcome)
+
+
+async def _fetch_source(session: aiohttp.ClientSession, source: Source) -> list[dict]:
+    last_error = None
+    for attempt in range(source.attempts):
+        headers = {"User-Agent": USER_AGENTS[attempt % len(USER_AGENTS)]}
+        try:
+            async with session.get(source.url, headers=headers) as resp:
+                if resp.status == 200:
+                    body = await resp.read()
+                    if source.cpu_bound:
+                        rows = await asyncio.to_thread(source.parse, body)
+                    else:
+                        rows = source.parse(body)
+                    if rows:
+                        return rows
+                    last_error = FetchError("response had no usable rows")
+                else:
+                    last_error = FetchError(f"HTTP {resp.status}")
+        except aiohttp.ClientError as e:
+            last_error = e
+        logger.info("%s attempt %s failed: %s", source.name, attempt + 1, last_error)
+        if attempt + 1 < source.attempts:
+            await asyncio.sleep(source.backoff * 2 ** attempt)
+    raise FetchError(f"{source.name}: {last_error}")
+
+
+async def race(sources: list[Source], limit_per_host: int = 4,
+               accept: Callable[[list[dict]], bool] | None = None) -> tuple[str | None, list[dict]]:
+    """
+    Runs all sources concurrently and returns (source_name, rows) from the
+    first to succeed, preferring earlier sources when several finish together.
+    With `accept`, rows it rejects (e.g. a mirror that lags behind) do not
+    count as success and the other sources keep running.
+    Returns (None, []) if every source fails, times out or is rejected.
+    """
+    if not sources:
+        return None, []
+    order = {s.name: i for i, s in enumerate(sources)}
+    connector = aiohttp.TCPConnector(limit_per_host=limit_per_host)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = {
+            asyncio.create_task(asyncio.wait_for(fetch_source(session, s), s.timeout)): s
+            for s in sources
+        }
+        started = time.perf_counter()
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: order[tasks[t].name]):
+                    source = tasks.pop(task)
+                    try:
+                        rows = task.result()
+                    except asyncio.TimeoutError:
+                        logger.warning("%s timed out after %.1fs", source.name, source.timeout)
+                        continue
+                    except Exception as e:
+                        logger.warning("%s failed: %s", source.name, e)
+                        continue
+                    if accept is not None and not accept(rows):
+                        logger.info("%s returned %s rows without the wanted draw", source.name, len(rows))
+                        continue
+                    logger.info("%s won with %s rows in %.2fs", source.name, len(rows), time.perf_counter() - started)
+                    return source.name, rows
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    return None, []
+
+
+def fetch_first(sources: list[Source], accept: Callable[[list[dict]], bool] | None = None) -> list[dict]:
+    """Synchronous entry point for scripts: rows from the fastest valid source."""
+    _, rows = asyncio.run(race(sources, accept=accept))
+    return rows
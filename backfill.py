@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# backfill.py
+"""
+Finds (Date, Draw) slots missing from the history and recovers them in bulk.
+
+The history is diffed against draw_calendar, the gaps are grouped into date
+ranges, every archive (local PDF/HTML files and/or URLs) is fetched and
+streamed through the parsers with bounded concurrency, keeping only rows for
+missing slots, and all recovered draws are written with a single append.
+
+    python backfill.py --archive data/archive/*.pdf
+    python backfill.py --url "http://mirror/cash3?from={start}&to={end}" --concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import aiohttp
+import pandas as pd
+
+import draw_calendar
+import history_store
+import parsers
+import prepare_data
+import stats_engine
+
+logger = logging.getLogger(__name__)
+
+# Downloads larger than this spill from memory to a temporary file before parsing.
+SPOOL_BYTES = 1024 * 1024
+DOWNLOAD_CHUNK = 64 * 1024
+
+
+def group_ranges(missing: list[tuple[date, str]]) -> list[tuple[date, date, int]]:
+    """Collapses sorted (date, label) gaps into (first_date, last_date, slot_count) runs of consecutive days."""
+    ranges = []
+    for day, _ in missing:
+        if ranges and day - ranges[-1][1] <= timedelta(days=1):
+            first, _, count = ranges[-1]
+            ranges[-1] = (first, day, count + 1)
+        else:
+            ranges.append((day, day, 1))
+    return ranges
+
+
+def parser_for(name: str):
+    """Streaming row parser for a file name or URL: PDFs page by page, anything else as results HTML."""
+    return parsers.iter_pdf_rows if name.lower().split("?", 1)[0].endswith(".pdf") else parsers.iter_results_html
+
+
+def _collect(parse, source, wanted=None) -> list[dict]:
+    """Drains a streaming parser, keeping only rows whose (Date, Draw) is in `wanted` (default: all)."""
+    if isinstance(source, Path):
+        with open(source, "rb") as f:
+            return _collect(parse, f, wanted)
+    keep = None if wanted is None else (lambda r: (r["Date"], r["Draw"]) in wanted)
+    return parsers.drain(parse, source, keep)
+
+
+async def _read_archive(path: Path, limit: asyncio.Semaphore, wanted=None) -> list[dict]:
+    async with limit:
+        return await asyncio.to_thread(_collect, parser_for(path.name), path, wanted)
+
+
+async def _fetch_url(session: aiohttp.ClientSession, url: str, limit: asyncio.Semaphore, wanted=None) -> list[dict]:
+    async with limit:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as f:
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK):
+                    f.write(chunk)
+            f.seek(0)
+            return await asyncio.to_thread(_collect, parser_for(url), f, wanted)
+
+
+async def gather_rows(archives: list[Path], url_templates: list[str], ranges, concurrency: int = 4,
+                      wanted=None) -> list[dict]:
+    """
+    Parses every archive file and fetches every URL template once per gap
+    range ({start}/{end} are ISO dates), at most `concurrency` at a time.
+    With `wanted`, a set of (ISO date, draw label), other rows are dropped
+    as they are parsed. Failed sources are logged and skipped.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    jobs = [(str(p), _read_archive(p, limit, wanted)) for p in archives]
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        for template in url_templates:
+            urls = {template.format(start=a.isoformat(), end=b.isoformat()) for a, b, _ in ranges}
+            jobs += [(url, _fetch_url(session, url, limit, wanted)) for url in sorted(urls)]
+        results = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+    rows = []
+    for (name, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            logger.warning("Skipping %s: %s", name, result)
+            continue
+        logger.info("%s: %s rows", name, len(result))
+        rows.extend(result)
+    return rows
+
+
+def backfill(archives=(), url_templates=(), start=None, end=None, concurrency=4, csv_path=prepare_data.HISTORY_PATH):
+    """Runs diff -> fetch -> ingest and returns a report dict with per-phase seconds."""
+    timings = {}
+
+    t0 = time.perf_counter()
+    cols = history_store.load_columns(csv_path=csv_path)
+    missing = draw_calendar.missing_draws(cols, start=start, end=end)
+    ranges = group_ranges(missing)
+    timings["diff"] = time.perf_counter() - t0
+    report = {"missing": len(missing), "ranges": len(ranges), "recovered": 0, "timings": timings}
+    if not missing:
+        return report
+    logger.info("%s missing draws in %s date ranges", len(missing), len(ranges))
+
+    t0 = time.perf_counter()
+    wanted = {(d.isoformat(), label) for d, label in missing}
+    rows = asyncio.run(gather_rows(list(archives), list(url_templates), ranges, concurrency, wanted))
+    timings["fetch"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    found = pd.DataFrame(rows)
+    if not found.empty:
+        report["recovered"], _ = history_store.append_draws(found, csv_path=csv_path)
+        cols = history_store.load_columns(csv_path=csv_path)
+        prepare_data.build_summary(cols, stats_engine.sync(cols))
+    timings["ingest"] = time.perf_counter() - t0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recover missing GA Cash3 draws from archives.")
+    parser.add_argument("--archive", "-a", nargs="*", default=[], type=Path, help="Local PDF/HTML archive files.")
+    parser.add_argument("--url", "-u", action="append", default=[],
+                        help="URL template fetched once per gap range; may use {start} and {end}.")
+    parser.add_argument("--start", type=date.fromisoformat, help="First date to check (default: first date in history).")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last date to check (default: most recent due draw).")
+    parser.add_argument("--concurrency", "-c", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true", help="Only report the missing ranges.")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        cols = history_store.load_columns(csv_path=prepare_data.HISTORY_PATH)
+        missing = draw_calendar.missing_draws(cols, start=args.start, end=args.end)
+        for first, last, count in group_ranges(missing):
+            print(f"{first.isoformat()} .. {last.isoformat()}: {count} draws")
+        print(f"{len(missing)} missing draws")
+        return
+
+    report = backfill(args.archive, args.url, args.start, args.end, args.concurrency)
+    phases = ", ".join(f"{k} {v:.2f}s" for k, v in report["timings"].items())
+    print(f"✅ Recovered {report['recovered']} of {report['missing']} missing draws "
+          f"({report['ranges']} ranges); {phases}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# backtest.py
+"""
+Walk-forward backtest: replays the history draw by draw, asks each strategy
+for a pick using only the draws before it, and records exact, box (any
+order) and per-position hits plus the rank of the actual result among all
+1000 triplets. Ties count half: the rank is the number of triplets scored
+higher plus half of the others scored the same, so a constant scorer ranks
+499.5 on average, and a pick among tied best scores is drawn at random.
+
+Every strategy runs as a walker holding incremental state, so one replay
+is a single linear pass: score the next draw, then push it. Strategy and
+parameter-grid combinations run in a process pool, each worker
+memory-mapping the columnar store. Results are saved as one compressed
+.npz of parallel columns.
+
+    python backtest.py --start 1000
+    python backtest.py --grid frequency:window=30,100,365 --grid transition:triplet_weight=0,0.5,1
+"""
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+import history_store
+import metrics
+from strategies import drawtime_model, frequency_matrix, history_index, repeat_analyzer, transition_matrix
+
+logger = logging.getLogger(__name__)
+
+RESULTS_PATH = Path("data/backtest_results.npz")
+# Seed for breaking ties between best-scored triplets, so reruns pick the same.
+TIE_SEED = 0
+BACKTEST_SECONDS = metrics.histogram("cash3_backtest_seconds", "Walk-forward replay time, by strategy spec")
+
+
+def _codes(cols) -> np.ndarray:
+    return (np.asarray(cols.d1, dtype=np.intp) * 100
+            + np.asarray(cols.d2, dtype=np.intp) * 10
+            + np.asarray(cols.d3, dtype=np.intp))
+
+
+# Walkers run the ensemble_predictor strategies of the same name on their own
+# incremental state: from_columns() builds it for a history prefix, scores(slot)
+# rates the next draw with the strategy's scoring and push() applies the draw.
+
+class FrequencyWalker:
+    def __init__(self, index, window=100, alpha=1.0):
+        self.index, self.window, self.alpha = index, window, alpha
+
+    @classmethod
+    def from_columns(cls, cols, **params):
+        return cls(history_index.HistoryIndex(cols), **params)
+
+    def scores(self, slot):
+        return frequency_matrix.score(self.index, window=self.window, alpha=self.alpha)
+
+    def push(self, date_ordinal, slot, d1, d2, d3):
+        self.index.update(date_ordinal, slot, d1, d2, d3)
+
+
+class RepeatWalker:
+    def __init__(self, index):
+        self.index = index
+
+    @classmethod
+    def from_columns(cls, cols):
+        return cls(history_index.HistoryIndex(cols))
+
+    def scores(self, slot):
+        return repeat_analyzer.score(self.index)
+
+    def push(self, date_ordinal, slot, d1, d2, d3):
+        self.index.update(date_ordinal, slot, d1, d2, d3)
+
+
+class TransitionWalker:
+    def __init__(self, matrix, alpha=1.0, triplet_weight=0.5):
+        self.matrix, self.alpha, self.triplet_weight = matrix, alpha, triplet_weight
+
+    @classmethod
+    def from_columns(cls, cols, **params):
+        return cls(transition_matrix.TransitionMatrix.from_columns(cols), **params)
+
+    def scores(self, slot):
+        return self.matrix.score(slot, alpha=self.alpha, triplet_weight=self.triplet_weight)
+
+    def push(self, date_ordinal, slot, d1, d2, d3):
+        self.matrix.update(date_ordinal, slot, d1, d2, d3)
+
+
+class DrawtimeWalker:
+    def __init__(self, partitions, alpha=1.0, triplet_weight=0.5):
+        self.partitions, self.alpha, self.triplet_weight = partitions, alpha, triplet_weight
+
+    @classmethod
+    def from_columns(cls, cols, **params):
+        return cls(drawtime_model.SlotPartitions.from_columns(cols), **params)
+
+    def scores(self, slot):
+        return self.partitions.score(slot, alpha=self.alpha, triplet_weight=self.triplet_weight)
+
+    def push(self, date_ordinal, slot, d1, d2, d3):
+        self.partitions.update(date_ordinal, slot, d1, d2, d3)
+
+
+class HotTripletsWalker:
+    def __init__(self, counts):
+        self.counts = counts
+
+    @classmethod
+    def from_columns(cls, cols):
+        return cls(np.bincount(_codes(cols), minlength=1000))
+
+    def scores(self, slot):
+        return frequency_matrix.smoothed(self.counts)
+
+    def push(self, date_ordinal, slot, d1, d2, d3):
+        self.counts[d1 * 100 + d2 * 10 + d3] += 1
+
+
+WALKERS = {
+    "frequency": FrequencyWalker,
+    "repeat": RepeatWalker,
+    "transition": TransitionWalker,
+    "drawtime": DrawtimeWalker,
+    "hot_triplets": HotTripletsWalker,
+}
+
+
+@dataclass(frozen=True)
+class Spec:
+    strategy: str
+    params: tuple = ()  # sorted (name, value) pairs
+
+    @property
+    def label(self) -> str:
+        if not self.params:
+            return self.strategy
+        return f"{self.strategy}(" + ",".join(f"{k}={v}" for k, v in self.params) + ")"
+
+
+def parse_grid(text: str) -> list[Spec]:
+    """'frequency:window=30,100;alpha=0.5' -> one Spec per parameter combination."""
+    name, _, rest = text.partition(":")
+    grid = [[]]
+    for part in filter(None, rest.split(";")):
+        key, _, values = part.partition("=")
+        grid = [combo + [(key, json.loads(v))] for combo in grid for v in values.split(",")]
+    return [Spec(name, tuple(sorted(combo))) for combo in grid]
+
+
+def walk(spec: Spec, cols, start: int = 0) -> dict:
+    """
+    Replays draws start..end with one walker. Returns parallel columns
+    (index, pick, actual, rank, exact, box, position) for the replayed draws.
+    """
+    start = max(start, 0)
+    walker = WALKERS[spec.strategy].from_columns(cols.take(slice(0, start)), **dict(spec.params))
+    dates = np.asarray(cols.date)[start:].tolist()
+    slots = np.asarray(cols.draw)[start:].tolist()
+    digits = np.stack([cols.d1, cols.d2, cols.d3], axis=1)[start:].tolist()
+    actual = _codes(cols)[start:]
+    picks = np.empty(len(actual), dtype=np.int64)
+    ranks = np.empty(len(actual), dtype=np.float64)
+    rng = np.random.default_rng(TIE_SEED)
+    for i, (date_ordinal, slot, (d1, d2, d3)) in enumerate(zip(dates, slots, digits)):
+        scores = walker.scores(slot)
+        best = np.flatnonzero(scores == scores.max())
+        picks[i] = best[0] if len(best) == 1 else rng.choice(best)
+        target = scores[actual[i]]
+        ranks[i] = np.count_nonzero(scores > target) + 0.5 * (np.count_nonzero(scores == target) - 1)
+        walker.push(date_ordinal, slot, d1, d2, d3)
+
+    pick_digits = np.stack([picks // 100, picks // 10 % 10, picks % 10], axis=1)
+    actual_digits = np.stack([actual // 100, actual // 10 % 10, actual % 10], axis=1)
+    return {
+        "index": np.arange(start, len(cols), dtype=np.int32),
+        "pick": picks.astype(np.uint16),
+        "actual": actual.astype(np.uint16),
+        "rank": ranks.astype(np.float32),
+        "exact": picks == actual,
+        "box": (np.sort(pick_digits, axis=1) == np.sort(actual_digits, axis=1)).all(axis=1),
+        "position": pick_digits == actual_digits,
+    }
+
+
+def _walk_job(spec, start, directory, csv_path):
+    cols = history_store.load_columns(directory, csv_path)
+    t0 = time.perf_counter()
+    result = walk(spec, cols, start)
+    return spec, result, time.perf_counter() - t0
+
+
+def default_specs() -> list[Spec]:
+    return [Spec(name) for name in WALKERS]
+
+
+def run(specs=None, start: int = 0, cols=None, processes: bool = True, workers=None,
+        directory=history_store.COLUMNS_DIR, csv_path=history_store.HISTORY_PATH) -> dict:
+    """
+    Backtests every spec. Returns {label: columns} with "seconds" added to
+    each; with processes=True the specs run in parallel workers.
+    """
+    specs = default_specs() if specs is None else list(specs)
+    results = {}
+    if processes and cols is None and len(specs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_walk_job, spec, start, directory, csv_path) for spec in specs]
+            done = [f.result() for f in futures]
+    else:
+        cols = history_store.load_columns(directory, csv_path) if cols is None else cols
+        done = []
+        for spec in specs:
+            t0 = time.perf_counter()
+            done.append((spec, walk(spec, cols, start), time.perf_counter() - t0))
+    for spec, result, seconds in done:
+        result["seconds"] = seconds
+        BACKTEST_SECONDS.observe(seconds, strategy=spec.label)
+        results[spec.label] = result
+        logger.info("Backtested %s over %s draws in %.2fs", spec.label, len(result["pick"]), seconds)
+    return results
+
+
+def summarize(results: dict) -> dict:
+    """Hit rates per strategy label."""
+    summary = {}
+    for label, r in results.items():
+        n = len(r["pick"])
+        summary[label] = {
+            "draws": n,
+            "exact": float(r["exact"].mean()) if n else 0.0,
+            "box": float(r["box"].mean()) if n else 0.0,
+            "position": r["position"].mean(axis=0).round(4).tolist() if n else [0.0] * 3,
+            "mean_rank": float(r["rank"].mean()) if n else 0.0,
+            "seconds": round(r["seconds"], 3),
+        }
+    return summary
+
+
+def save(results: dict, path: Path = RESULTS_PATH):
+    """All runs as one table of parallel columns; `strategy` indexes into `labels`."""
+    labels = list(results)
+    columns = {"labels": np.array(labels)}
+    if labels:
+        columns["strategy"] = np.concatenate(
+            [np.full(len(r["pick"]), i, dtype=np.uint16) for i, r in enumerate(results.values())])
+        for name in ("index", "pick", "actual", "rank", "exact", "box", "position"):
+            columns[name] = np.concatenate([r[name] for r in results.values()])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **columns)
+    logger.info("Wrote %s backtest rows to %s", len(columns.get("pick", ())), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the Cash3 strategies.")
+    parser.add_argument("--strategy", "-s", action="append", choices=sorted(WALKERS),
+                        help="Backtest only these strategies with default parameters (repeatable).")
+    parser.add_argument("--grid", "-g", action="append", default=[],
+                        help="Parameter grid, e.g. frequency:window=30,100;alpha=0.5,1 (repeatable).")
+    parser.add_argument("--start", type=int, default=0, help="First draw index to predict.")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--serial", action="store_true", help="Run in this process only.")
+    parser.add_argument("--out", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    specs = [Spec(name) for name in args.strategy or []]
+    for grid in args.grid:
+        specs += parse_grid(grid)
+    results = run(specs or None, args.start, processes=not args.serial, workers=args.workers)
+    save(results, args.out)
+    for label, stats in summarize(results).items():
+        print(f"📊 {label}: {stats['draws']} draws, exact {stats['exact']:.2%}, box {stats['box']:.2%}, "
+              f"positions {stats['position']}, mean rank {stats['mean_rank']:.0f}, {stats['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
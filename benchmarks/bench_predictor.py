@@ -0,0 +1,55 @@
+# benchmarks/bench_predictor.py
+"""
+Compares the vectorized predictor.top_triplets/hot_digits against the
+original DataFrame.apply / iterrows implementations.
+
+    python -m benchmarks.bench_predictor --draws 1000000
+"""
+import argparse
+import time
+from collections import Counter
+
+import predictor
+from benchmarks.synthetic import synthetic_columns, history_store
+
+def legacy_top_triplets(df, n=5):
+    df = df.copy()
+    df["Triplet"] = df.apply(lambda r: f"{int(r.Digit1)}{int(r.Digit2)}{int(r.Digit3)}", axis=1)
+    counts = Counter(df["Triplet"])
+    return counts.most_common(n)
+
+def legacy_hot_digits(df):
+    overall = Counter()
+    for _, r in df.iterrows():
+        overall.update([r.Digit1, r.Digit2, r.Digit3])
+    return overall.most_common()
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--draws", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cols = synthetic_columns(args.draws, args.seed)
+    df = history_store.columns_to_frame(cols)
+    print(f"Synthetic history: {len(cols):,} draws")
+
+    cases = [
+        ("top_triplets", legacy_top_triplets, lambda: predictor.top_triplets(cols=cols)),
+        ("hot_digits", legacy_hot_digits, lambda: predictor.hot_digits(cols=cols)),
+    ]
+    for name, legacy, vectorized in cases:
+        new, t_new = timed(vectorized)
+        old, t_old = timed(legacy, df)
+        old = [(k if isinstance(k, str) else int(k), int(v)) for k, v in old]
+        status = "same" if old == new else "MISMATCH"
+        print(f"{name:13s} legacy {t_old:9.3f}s  vectorized {t_new:8.4f}s  "
+              f"speed-up {t_old / t_new:8.0f}x  results {status}")
+
+if __name__ == "__main__":
+    main()
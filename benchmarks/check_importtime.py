@@ -0,0 +1,89 @@
+# benchmarks/check_importtime.py
+"""
+Cold-start guard: imports each entry point in a fresh interpreter with
+`python -X importtime`, reports the slowest modules, and fails if a heavy
+library shows up where it should be lazy or a budget is exceeded.
+tests/test_importtime.py runs the same check under pytest.
+
+    python -m benchmarks.check_importtime
+    python -m benchmarks.check_importtime --budget-ms 600 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# entry module -> top-level packages it must not import at load time
+FORBIDDEN = {
+    "app": ("pandas", "pdfplumber", "pdfminer", "aiohttp", "bs4"),
+    "data_store": ("pandas", "pdfplumber"),
+    "prepare_data": ("pdfplumber", "pdfminer"),
+}
+
+# entry module -> cumulative import budget in ms (pandas alone costs more than these)
+BUDGET_MS = {
+    "app": 600,
+    "data_store": 400,
+    "prepare_data": 1000,
+}
+
+
+def import_profile(module: str) -> dict[str, tuple[int, int]]:
+    """{module: (self_us, cumulative_us)} from -X importtime for `import module`."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        profile[name.strip()] = (int(self_us), int(cumulative))
+    return profile
+
+
+def check(module: str, budget_ms: float | None = None, top: int = 0) -> list[str]:
+    if budget_ms is None:
+        budget_ms = BUDGET_MS.get(module, 0)
+    profile = import_profile(module)
+    total_ms = profile.get(module, (0, 0))[1] / 1000
+    print(f"⏱️ import {module}: {total_ms:.1f} ms cumulative")
+    heaviest = sorted(profile.items(), key=lambda kv: kv[1][1], reverse=True)
+    for name, (_, cumulative) in [kv for kv in heaviest if kv[0] != module][:top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    loaded = {name.split(".")[0] for name in profile}
+    for package in FORBIDDEN.get(module, ()):
+        if package in loaded:
+            failures.append(f"{module} imports {package} at load time")
+    if budget_ms and total_ms > budget_ms:
+        failures.append(f"{module} took {total_ms:.0f} ms to import (budget {budget_ms:.0f} ms)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cold-start import cost of the entry points.")
+    parser.add_argument("modules", nargs="*", default=list(FORBIDDEN))
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if any import exceeds this (default: BUDGET_MS per module, 0 = no budget).")
+    parser.add_argument("--top", type=int, default=8, help="Slowest modules to list per entry point.")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        failures += check(module, args.budget_ms, args.top)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ No heavy imports on the cold-start paths")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+# benchmarks/run_suite.py
+"""
+End-to-end benchmark suite on synthetic data, fully offline.
+
+For each history size it times every pipeline stage (CSV write, merge of new
+draws, typed CSV read, normalization, history snapshot load, statistics,
+summary rebuild, predictor, ensemble, backtest and the `/` page through the
+Flask test client), plus parsing a synthetic multi-page winning-numbers PDF
+and a lotterypost-style HTML page. Each stage reports its median wall time
+of --repeat runs and, in one extra traced run, its peak traced allocation.
+
+Results are compared with benchmarks/baseline.json; a stage fails when it is
+slower (or uses more memory) than the baseline by more than the tolerance.
+Whole runs drift by up to ~40% on a shared one-CPU machine, hence the 0.5
+default, doubled for stages under FAST_STAGE_SECONDS. Record the baseline as
+the median of several runs rather than from a single one:
+
+    python -m benchmarks.run_suite
+    python -m benchmarks.run_suite --sizes 3000,100000 --tolerance 0.25
+    python -m benchmarks.run_suite --output run1.json   # ... run2.json, run3.json
+    python -m benchmarks.run_suite --update-baseline --from run1.json --from run2.json --from run3.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+
+SIZES = (3_000, 100_000, 1_000_000)
+# Draws merged into the existing history by the merge stage (one week's worth).
+MERGE_DRAWS = 21
+# Draws replayed by the backtest stage; the walkers start from the history before them.
+BACKTEST_DRAWS = 1_000
+PDF_DRAWS = 450  # 10 pages of 45 rows
+HTML_DRAWS = 1_000
+# Differences smaller than these are noise, whatever the relative change.
+MIN_DELTA_SECONDS = 0.005
+MIN_DELTA_MB = 1.0
+# Stages faster than this get FAST_STAGE_FACTOR times the time tolerance.
+FAST_STAGE_SECONDS = 0.1
+FAST_STAGE_FACTOR = 2.0
+REPEAT = 5
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[], object]
+    setup: Callable[[], None] | None = None  # untimed, before every run
+
+
+def measure(stage: Stage, repeat: int, memory: bool) -> dict:
+    times = []
+    for _ in range(repeat):
+        if stage.setup:
+            stage.setup()
+        gc.collect()
+        t0 = time.perf_counter()
+        stage.run()
+        times.append(time.perf_counter() - t0)
+    result = {"seconds": round(statistics.median(times), 6)}
+    if memory:
+        if stage.setup:
+            stage.setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            stage.run()
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def _reset_caches():
+    """Drops process-wide state so each run starts cold."""
+    import data_store
+    import dashboard
+    from strategies import drawtime_model, history_index
+
+    data_store._summary_cache.invalidate()
+    data_store._history_cache.invalidate()
+    dashboard._manifest_cache.invalidate()
+    drawtime_model._partitions = None
+    history_index._shared = None
+
+
+def history_stages(n: int, workdir: Path) -> list[Stage]:
+    import backtest
+    import data_store
+    import ensemble_predictor
+    import history_store
+    import normalize
+    import predictor
+    import prepare_data
+    import stats_engine
+    from app import app
+    from benchmarks.synthetic import synthetic_columns
+
+    cols = synthetic_columns(n, seed=n)
+    frame = history_store.columns_to_frame(cols)
+    base, fresh = frame.iloc[:-MERGE_DRAWS], frame.iloc[-MERGE_DRAWS:].reset_index(drop=True)
+    data, snapshot = workdir / "data", workdir / "snapshot"
+
+    def reset_data():
+        shutil.rmtree(data, ignore_errors=True)
+
+    def restore_base():
+        shutil.rmtree(data, ignore_errors=True)
+        shutil.copytree(snapshot, data)
+        _reset_caches()
+
+    # The merge stage starts from this history; every later stage reads the merged one.
+    reset_data()
+    history_store.write_history(base)
+    history_store.load_columns()
+    shutil.rmtree(snapshot, ignore_errors=True)
+    shutil.copytree(data, snapshot)
+    restore_base()
+    prepare_data.merge_and_write_history(fresh)
+    cols = history_store.load_columns(mmap=False)
+    raw = normalize.load_raw(history_store.HISTORY_PATH)
+    client = app.test_client()
+
+    def drop_stats():
+        stats_engine.STATE_PATH.unlink(missing_ok=True)
+        _reset_caches()
+
+    def unpublish():
+        shutil.rmtree(data / "dashboard", ignore_errors=True)
+        _reset_caches()
+
+    def get_index():
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200, response.status_code
+        return response.get_data()
+
+    stages = [
+        Stage("write_history", lambda: history_store.write_history(frame), reset_data),
+        Stage("merge", lambda: prepare_data.merge_and_write_history(fresh), restore_base),
+        Stage("read_csv", lambda: normalize.read_history(history_store.HISTORY_PATH)),
+        Stage("normalize", lambda: normalize.clean(raw)),
+        Stage("load_history", lambda: data_store.load_history(data_store.HISTORY_PATH)),
+        Stage("stats", lambda: prepare_data.compute_simple_insights(stats_engine.StatsState.from_columns(cols))),
+        Stage("top_triplets", lambda: (predictor.top_triplets(cols=cols), predictor.hot_digits(cols=cols))),
+        Stage("ensemble", lambda: ensemble_predictor.run(cols, cache=ensemble_predictor.ScoreCache(None))),
+        Stage("backtest", lambda: backtest.run(start=len(cols) - BACKTEST_DRAWS, cols=cols, processes=False)),
+        Stage("summary", lambda: prepare_data.build_summary(cols), drop_stats),
+        # First request after startup: cold caches, artifact served from disk.
+        Stage("index", get_index, _reset_caches),
+        Stage("index_live", get_index, unpublish),
+    ]
+    return stages
+
+
+def ingest_stages(workdir: Path) -> list[Stage]:
+    import parsers
+    import prepare_data
+    from benchmarks.synthetic import results_html, synthetic_columns, write_winning_numbers_pdf
+
+    pdf_path = workdir / "winning_numbers.pdf"
+    write_winning_numbers_pdf(pdf_path, synthetic_columns(PDF_DRAWS, seed=1))
+    html = results_html(synthetic_columns(HTML_DRAWS, seed=2))
+    pdf_bytes = pdf_path.read_bytes()
+
+    def parse_pdf():
+        df = prepare_data.parse_pdf_to_dataframe(pdf_path, use_cache=False)
+        assert len(df) == PDF_DRAWS, len(df)
+
+    def parse_html():
+        rows = parsers.parse_results_html(html)
+        assert len(rows) == HTML_DRAWS, len(rows)
+
+    return [
+        Stage("parse_pdf", parse_pdf),
+        Stage("parse_pdf_text", lambda: parsers.parse_pdf_bytes(pdf_bytes)),
+        Stage("parse_html", parse_html),
+    ]
+
+
+def run_suite(sizes, repeat: int = REPEAT, memory: bool = True, only=None) -> dict:
+    results = {}
+
+    def record(group, stages):
+        for stage in stages:
+            if only and stage.name not in only:
+                continue
+            key = f"{group}/{stage.name}"
+            results[key] = measure(stage, repeat, memory)
+            mem = f"  {results[key]['peak_mb']:8.1f} MB" if "peak_mb" in results[key] else ""
+            print(f"   {key:24s} {results[key]['seconds'] * 1000:10.1f} ms{mem}", flush=True)
+
+    with tempfile.TemporaryDirectory(prefix="cash3-bench-") as tmp:
+        workdir = Path(tmp)
+        # Every data/ path in the project is relative to the working directory.
+        previous = os.getcwd()
+        os.chdir(workdir)
+        try:
+            print("📄 Ingest inputs")
+            record("ingest", ingest_stages(workdir))
+            for n in sizes:
+                print(f"📊 {n:,} draws")
+                record(str(n), history_stages(n, workdir))
+        finally:
+            os.chdir(previous)
+            _reset_caches()
+    return results
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, memory_tolerance: float) -> list[str]:
+    """Prints each stage against the baseline and returns the regressions."""
+    regressions = []
+    reference = baseline.get("results", {})
+    print(f"\n{'stage':27s} {'ms':>10s} {'baseline':>10s} {'change':>8s} {'peak MB':>9s} {'baseline':>9s}")
+    for key, result in results.items():
+        base = reference.get(key)
+        seconds, peak = result["seconds"], result.get("peak_mb")
+        if base is None:
+            print(f"{key:27s} {seconds * 1000:10.1f} {'new':>10s}")
+            continue
+        change = seconds / base["seconds"] - 1 if base["seconds"] else 0.0
+        allowed = tolerance * (FAST_STAGE_FACTOR if base["seconds"] < FAST_STAGE_SECONDS else 1)
+        flag = ""
+        if seconds > base["seconds"] * (1 + allowed) and seconds - base["seconds"] > MIN_DELTA_SECONDS:
+            regressions.append(f"{key} took {seconds * 1000:.1f} ms (baseline {base['seconds'] * 1000:.1f} ms, {change:+.0%})")
+            flag = " ❌"
+        mem = ""
+        if peak is not None and "peak_mb" in base:
+            mem = f" {peak:9.1f} {base['peak_mb']:9.1f}"
+            if peak > base["peak_mb"] * (1 + memory_tolerance) and peak - base["peak_mb"] > MIN_DELTA_MB:
+                regressions.append(f"{key} peaked at {peak:.1f} MB (baseline {base['peak_mb']:.1f} MB)")
+                flag = " ❌"
+        print(f"{key:27s} {seconds * 1000:10.1f} {base['seconds'] * 1000:10.1f} {change:+8.0%}{mem}{flag}")
+    return regressions
+
+
+def median_report(reports: list[dict]) -> dict:
+    """Per-stage medians of several --output reports, e.g. to record a baseline from separate runs."""
+    results = {}
+    for key in reports[0]["results"]:
+        runs = [report["results"][key] for report in reports if key in report["results"]]
+        results[key] = {field: round(statistics.median(run[field] for run in runs), 6) for field in runs[0]}
+    return {
+        "environment": reports[0]["environment"],
+        "max_rss_mb": max(report["max_rss_mb"] for report in reports),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and profile every pipeline stage on synthetic histories.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="Comma-separated history sizes in draws (default: %(default)s).")
+    parser.add_argument("--stage", action="append", help="Run only these stages (repeatable), e.g. --stage summary.")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Runs per stage; the median is reported.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run that records peak memory.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slowdown over the baseline as a fraction, doubled for stages under "
+                             f"{FAST_STAGE_SECONDS * 1000:.0f} ms (default: %(default)s).")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25,
+                        help="Allowed peak-memory growth over the baseline as a fraction (default: %(default)s).")
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline.")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON here.")
+    parser.add_argument("--from", dest="sources", type=Path, action="append",
+                        help="Use the median of these --output files instead of running (repeatable).")
+    args = parser.parse_args()
+    sys.path.insert(0, str(ROOT))
+    # Configured before the pipeline modules' own basicConfig(INFO) calls, which then do nothing.
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.sources:
+        report = median_report([json.loads(path.read_text()) for path in args.sources])
+        results = report["results"]
+    else:
+        sizes = [int(s) for s in args.sizes.split(",") if s]
+        results = run_suite(sizes, repeat=args.repeat, memory=not args.no_memory, only=args.stage)
+        report = {
+            "environment": environment(),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "results": results,
+        }
+    print(f"\n🧠 Max RSS: {report['max_rss_mb']:.0f} MB")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        if args.baseline.exists():
+            # Keep stages and sizes that were not part of this run.
+            previous = json.loads(args.baseline.read_text())
+            report["results"] = previous.get("results", {}) | results
+            report["max_rss_mb"] = max(report["max_rss_mb"], previous.get("max_rss_mb", 0))
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"✅ Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("environment") != environment():
+        print(f"⚠️ Baseline was recorded on {baseline.get('environment')}; timings may not be comparable.")
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print(f"❌ {regression}")
+    if regressions:
+        sys.exit(1)
+    print("✅ No regressions beyond the tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/standin_server.py
+"""
+Local stand-in for the results sites: serves canned bodies with per-route
+latency and scripted failures, so fetchers can be exercised offline.
+
+    with serve({"/cash3.html": Route(html, "text/html", latency=0.5)}) as base:
+        ...  # fetch f"{base}/cash3.html"
+"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+@dataclass
+class Route:
+    body: bytes | str
+    content_type: str = "text/html; charset=utf-8"
+    latency: float = 0.0  # seconds slept before answering
+    fail_first: int = 0  # answer this many requests with fail_status first
+    fail_status: int = 503
+    requests: int = field(default=0, init=False)
+
+class _Handler(BaseHTTPRequestHandler):
+    routes: dict = {}
+
+    def do_GET(self):
+        route = self.routes.get(self.path.split("?", 1)[0])
+        if route is None:
+            self.send_error(404)
+            return
+        route.requests += 1
+        time.sleep(route.latency)
+        if route.requests <= route.fail_first:
+            self.send_error(route.fail_status)
+            return
+        body = route.body.encode("utf-8") if isinstance(route.body, str) else route.body
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", route.content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (e.g. a cancelled race loser)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextmanager
+def serve(routes: dict[str, Route]):
+    """Runs the server on a free localhost port and yields its base URL."""
+    handler = type("Handler", (_Handler,), {"routes": routes})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
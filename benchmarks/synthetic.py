@@ -0,0 +1,94 @@
+# benchmarks/synthetic.py
+"""Synthetic Cash 3 histories for benchmarks: three draws a day, uniform digits."""
+from datetime import date
+
+import numpy as np
+
+import history_store
+
+def synthetic_columns(n_draws: int, seed: int = 0, start: date = date(1990, 1, 1)):
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_draws)
+    digits = rng.integers(0, 10, size=(n_draws, 3), dtype=np.uint8)
+    return history_store.HistoryColumns(
+        date=(start.toordinal() + idx // 3).astype(np.int32),
+        draw=(idx % 3).astype(np.uint8),
+        d1=digits[:, 0].copy(),
+        d2=digits[:, 1].copy(),
+        d3=digits[:, 2].copy(),
+    )
+
+def synthetic_frame(n_draws: int, seed: int = 0, start: date = date(1990, 1, 1)):
+    return history_store.columns_to_frame(synthetic_columns(n_draws, seed, start))
+
+def _pdf_table_page(rows, row_height=16, top=760, left=50, widths=(90, 70, 40, 40, 40, 60, 80)):
+    """Content stream for one page: ruled table cells with Helvetica text."""
+    ops = ["0.5 w"]
+    xs = [left]
+    for w in widths:
+        xs.append(xs[-1] + w)
+    for r, cells in enumerate(rows):
+        y = top - r * row_height
+        for c, text in enumerate(cells):
+            ops.append(f"{xs[c]} {y - row_height} {widths[c]} {row_height} re S")
+            ops.append(f"BT /F1 9 Tf {xs[c] + 4} {y - row_height + 4} Td ({text}) Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+def write_winning_numbers_pdf(path, cols, rows_per_page: int = 45):
+    """
+    Writes a minimal multi-page PDF laid out like the lottery's winning
+    numbers report (newest draw first), without any PDF library.
+    """
+    frame = history_store.columns_to_frame(cols).iloc[::-1]
+    header = ("Date", "Draw", "D1", "D2", "D3", "Winners", "Total payout")
+    body = [
+        (date.fromisoformat(r.Date).strftime("%m/%d/%Y"), r.Draw, r.Digit1, r.Digit2, r.Digit3,
+         f"{1000 + i % 900:,}", f"${90000 + i * 7 % 50000:,}")
+        for i, r in enumerate(frame.itertuples(index=False))
+    ]
+    pages = [body[i:i + rows_per_page] for i in range(0, len(body), rows_per_page)] or [[]]
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for rows in pages:
+        stream = _pdf_table_page([header, *rows])
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+def results_html(cols, limit: int | None = None) -> str:
+    """A lotterypost-style results page (table.results), newest draw first."""
+    frame = history_store.columns_to_frame(cols).iloc[::-1]
+    if limit is not None:
+        frame = frame.head(limit)
+    rows = "\n".join(
+        f"<tr><td>{date.fromisoformat(r.Date).strftime('%m/%d/%Y')}</td><td>{r.Draw}</td>"
+        f"<td><span>{r.Digit1}</span> <span>{r.Digit2}</span> <span>{r.Digit3}</span></td></tr>"
+        for r in frame.itertuples(index=False)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Georgia Cash 3</title></head><body>"
+        "<table class=\"results\"><thead><tr><th>Date</th><th>Draw</th><th>Numbers</th></tr></thead>"
+        f"<tbody>\n{rows}\n</tbody></table></body></html>"
+    )
@@ -1,4 +1,5 @@
 # config.py
+from datetime import time, timedelta
 from pathlib import Path
 
 # Data paths
@@ -12,9 +13,17 @@ SUMMARY_JSON = DATA_DIR / "summary.json"
 # Fallback PDF URL (set to the authoritative source; update if it changes)
 PDF_URL = "https://example.com/path/to/latest.pdf"  # <-- replace with real PDF link
 
-# Known draw times (ET)
+# Draw schedule: the single source of truth for draw times, in TIMEZONE.
+TIMEZONE = "America/New_York"
+DRAW_SCHEDULE = {
+    "Midday": time(12, 20),
+    "Evening": time(18, 59),
+    "Night": time(23, 34),
+}
+# How long after a draw its result is expected to be published.
+GRACE = timedelta(minutes=30)
+
+# Known draw times (ET), for display
 DRAW_TIMES = {
-    "Midday": "12:20 PM",
-    "Evening": "6:59 PM",
-    "Night": "11:34 PM"
+    label: t.strftime("%I:%M %p").lstrip("0") for label, t in DRAW_SCHEDULE.items()
 }
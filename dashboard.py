@@ -0,0 +1,186 @@
+# dashboard.py
+"""
+Pre-rendered dashboard artifacts.
+
+publish() renders index.html and the summary/latest/predictions JSON
+bundles once per data update into data/dashboard/<version>/, with gzip (and
+brotli, if installed) copies next to each file, then atomically swaps
+manifest.json to the new version. The web app serves them through send():
+a stat of the manifest, then either a 304 or a file send, with no template
+rendering or data parsing. The manifest records the (mtime, size) of the
+history CSV and summary.json it was rendered from, and the next draw the
+bundles predict; once either file changes without a new publish (e.g.
+update_csv.py appended draws) or that draw comes due, send() declines and
+the app renders live again until refresh() or the next publish.
+
+    python dashboard.py
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import Response, request, send_file
+
+import data_store
+import draw_calendar
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_DIR = Path("data/dashboard")
+MANIFEST_PATH = DASHBOARD_DIR / "manifest.json"
+# Older versions stay on disk briefly for requests already in flight.
+KEEP_VERSIONS = 3
+
+# Data files the artifacts are rendered from.
+SOURCES = (data_store.HISTORY_PATH, data_store.SUMMARY_PATH)
+
+# Preferred first when the client accepts several.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def _compress(data: bytes) -> dict[str, bytes]:
+    out = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        out["br"] = brotli.compress(data)
+    return out
+
+
+def _etag(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _next_due() -> str:
+    """Scheduled time of the draw the bundles predict (see data_store.next_draw)."""
+    return draw_calendar.calendar().next_due(datetime.now(draw_calendar.TZ))[1].isoformat()
+
+
+def render_bundles() -> dict[str, tuple[bytes, str]]:
+    """{file name: (content, mimetype)} for the dashboard page and its JSON bundles."""
+    from flask import render_template
+
+    from app import app, dashboard_context, json_bundles
+
+    with app.test_request_context("/"):
+        context = dashboard_context()
+        html = render_template("index.html", **context)
+    out = {"index.html": (html.encode("utf-8"), "text/html; charset=utf-8")}
+    for name, payload in json_bundles(context).items():
+        out[f"{name}.json"] = (json.dumps(payload, separators=(",", ":")).encode("utf-8"), "application/json")
+    return out
+
+
+@metrics.timed("cash3_dashboard_publish_seconds", "Dashboard pre-render and compression time")
+def publish(directory: Path = DASHBOARD_DIR) -> dict:
+    """Renders and writes a new artifact version, switches the manifest to it and returns the manifest."""
+    files = {}
+    # Taken before rendering, so a write racing the render makes the artifacts look stale, not fresh.
+    sources = {str(path): data_store.file_signature(path) for path in SOURCES}
+    next_due = _next_due()
+    bundles = render_bundles()
+    version = _etag(b"".join(_etag(content).encode() for content, _ in bundles.values()))[:16]
+    target = directory / version
+    target.mkdir(parents=True, exist_ok=True)
+    for name, (content, mimetype) in bundles.items():
+        etag = _etag(content)
+        (target / name).write_bytes(content)
+        encodings = {}
+        for encoding, data in _compress(content).items():
+            (target / (name + ENCODINGS[encoding])).write_bytes(data)
+            encodings[encoding] = f"{etag}-{encoding}"
+        files[name] = {"etag": etag, "mimetype": mimetype, "size": len(content), "encodings": encodings}
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "sources": sources,
+        "next_due": next_due,
+        "files": files,
+    }
+    tmp = directory / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, directory / "manifest.json")
+
+    versions = sorted((p for p in directory.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    for old in versions[:-KEEP_VERSIONS]:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    logger.info("Published dashboard version %s to %s", version, directory)
+    return manifest
+
+
+def is_current(manifest: dict) -> bool:
+    """True if the data files are unchanged since the manifest was published and its next draw is not due yet."""
+    sources = manifest.get("sources")
+    if not sources or manifest.get("next_due") != _next_due():
+        return False
+    return all(
+        data_store.file_signature(path) == (tuple(signature) if signature else None)
+        for path, signature in sources.items()
+    )
+
+
+def refresh(directory: Path = DASHBOARD_DIR) -> bool:
+    """Republishes if the published artifacts are out of date; True if it did."""
+    if is_current(_load_manifest(directory / "manifest.json")):
+        return False
+    publish(directory)
+    return True
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+_manifest_cache = data_store.FileCache(str(MANIFEST_PATH), _load_manifest)
+
+
+def send(name: str) -> Response | None:
+    """
+    Response for a published artifact in the best encoding the client
+    accepts, or a 304 if its ETag matches If-None-Match. None if nothing
+    has been published yet or the data changed since.
+    """
+    manifest = _manifest_cache.get()
+    entry = manifest.get("files", {}).get(name)
+    if entry is None or not is_current(manifest):
+        return None
+
+    path = DASHBOARD_DIR / manifest["version"] / name
+    etag, encoding = entry["etag"], None
+    for candidate in ENCODINGS:
+        if candidate in entry["encodings"] and request.accept_encodings[candidate]:
+            encoding, etag = candidate, entry["encodings"][candidate]
+            path = path.with_name(name + ENCODINGS[candidate])
+            break
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = send_file(path.resolve(), mimetype=entry["mimetype"], conditional=False, etag=False, max_age=0)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    manifest = publish()
+    print(f"✅ Dashboard version {manifest['version']}: " + ", ".join(manifest["files"]))
@@ -0,0 +1,182 @@
+# data_store.py
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+import draw_calendar
+import history_store
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PATH = os.path.join("data", "summary.json")
+HISTORY_PATH = os.path.join("data", "ga_cash3_history.csv")
+
+DRAW_ORDER = history_store.SLOT_INDEX
+
+_MISSING = object()
+
+
+def file_signature(path):
+    """(mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class FileCache:
+    """
+    Keeps the parsed contents of one file in memory and re-runs `loader`
+    only when the file's (mtime, size) signature changes.
+    """
+
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0}
+        self._signature = None
+        self._value = _MISSING
+        self._lock = threading.Lock()
+
+    def get(self):
+        signature = file_signature(self.path)
+        with self._lock:
+            if self._value is not _MISSING and signature == self._signature:
+                self.stats["hits"] += 1
+                return self._value
+            if self._value is _MISSING:
+                self.stats["misses"] += 1
+            else:
+                self.stats["reloads"] += 1
+                logger.info("%s changed on disk; reloading", self.path)
+            self._value = self.loader(self.path)
+            self._signature = signature
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = _MISSING
+            self._signature = None
+
+
+class HistorySnapshot:
+    """
+    The history columns in (date, draw) order, memory-mapped from the
+    columnar store so forked workers share their pages. Pagination and
+    date-range queries are bisects over the date column, and only the rows
+    of the requested page are converted to dicts.
+    """
+
+    def __init__(self, cols=None):
+        self.cols = history_store.HistoryColumns.empty() if cols is None else cols
+        self.total_draws = len(self.cols)
+        # Row indices of each draw slot, built on the first query filtering by it.
+        self._positions = {}
+
+    def _records(self, index):
+        return history_store.columns_to_records(self.cols.take(index))
+
+    @property
+    def latest(self):
+        return self._records(slice(-1, None))[0] if self.total_draws else None
+
+    def recent(self, n):
+        return self.query(0, n)[0]
+
+    def _slot_positions(self, draw):
+        positions = self._positions.get(draw)
+        if positions is None:
+            slot = DRAW_ORDER.get(draw)
+            if slot is None:
+                positions = np.empty(0, dtype=np.intp)
+            else:
+                positions = np.flatnonzero(np.asarray(self.cols.draw) == slot)
+            self._positions[draw] = positions
+        return positions
+
+    def query(self, offset=0, limit=50, draw=None, start=None, end=None):
+        """
+        Newest-first slice of the history. `start`/`end` are inclusive ISO
+        dates. Returns (rows, total_matching).
+        """
+        dates = self.cols.date
+        lo = int(np.searchsorted(dates, date.fromisoformat(start).toordinal(), "left")) if start else 0
+        hi = int(np.searchsorted(dates, date.fromisoformat(end).toordinal(), "right")) if end else len(dates)
+        positions = None
+        if draw is not None:
+            positions = self._slot_positions(draw)
+            lo, hi = (int(i) for i in np.searchsorted(positions, [lo, hi]))
+        total = max(hi - lo, 0)
+        first = hi - 1 - offset
+        last = max(lo, hi - offset - limit)
+        picked = np.arange(first, last - 1, -1)
+        if not len(picked):
+            return [], total
+        if positions is not None:
+            picked = positions[picked]
+        return self._records(picked), total
+
+
+def load_summary(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning("summary.json malformed or unreadable: %s", e)
+        return {}
+
+
+def load_history(path):
+    # The memory-mapped columns themselves; pandas is only needed if the
+    # columnar store is stale and the CSV has to be read instead.
+    try:
+        cols = history_store.load_columns(csv_path=path)
+    except Exception as e:
+        logger.warning("failed to load history: %s", e)
+        return HistorySnapshot()
+    return HistorySnapshot(cols)
+
+
+_summary_cache = FileCache(SUMMARY_PATH, load_summary)
+_history_cache = FileCache(HISTORY_PATH, load_history)
+
+
+def get_summary() -> dict:
+    """Parsed summary.json; callers must not mutate the returned dict."""
+    return _summary_cache.get()
+
+
+def get_history() -> HistorySnapshot:
+    """Parsed history plus precomputed latest draw and totals."""
+    return _history_cache.get()
+
+
+def next_draw(summary: dict, now: datetime | None = None) -> dict:
+    """
+    The summary's prediction for the first draw not yet due at `now`.
+    Picked per request, so it moves on when a draw comes due even if the
+    summary has not been rebuilt yet.
+    """
+    label, scheduled = draw_calendar.calendar().next_due(now or datetime.now(draw_calendar.TZ))
+    prediction = summary.get("next_draws", {}).get(label)
+    if prediction is None:
+        return {}
+    return {"draw": label, "date": scheduled.date().isoformat(), **prediction}
+
+
+def warm():
+    """Loads both caches, e.g. in the gunicorn master so forked workers share them."""
+    get_summary()
+    get_history()
+
+
+def cache_stats() -> dict:
+    return {
+        "summary": dict(_summary_cache.stats),
+        "history": dict(_history_cache.stats),
+    }
@@ -0,0 +1,117 @@
+# draw_calendar.py
+"""
+Precomputed table of scheduled draws built from config.DRAW_SCHEDULE.
+
+"Most recent due draw" and "next draw" are bisects over sorted timestamps,
+and missing_draws() diffs the whole history against the expected slots in
+one vectorized pass.
+"""
+import bisect
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+import history_store
+from config import DRAW_SCHEDULE, GRACE, TIMEZONE
+
+TZ = ZoneInfo(TIMEZONE)
+
+# Draw labels in the order they happen each day.
+SLOTS = tuple(sorted(DRAW_SCHEDULE, key=DRAW_SCHEDULE.get))
+
+
+def generate(start: date, end: date):
+    """Yields (date, label, scheduled datetime) for every draw in [start, end]."""
+    day = start
+    while day <= end:
+        for label in SLOTS:
+            yield day, label, datetime.combine(day, DRAW_SCHEDULE[label], tzinfo=TZ)
+        day += timedelta(days=1)
+
+
+class DrawCalendar:
+    """
+    Draw table covering a date range, extended on demand. `times` holds the
+    scheduled POSIX timestamps in order so lookups are bisects.
+    """
+
+    def __init__(self, start: date, end: date):
+        self._build(start, end)
+
+    def _build(self, start: date, end: date):
+        self.start, self.end = start, end
+        self.draws = list(generate(start, end))
+        self.times = [at.timestamp() for _, _, at in self.draws]
+
+    def _cover(self, moment: datetime):
+        day = moment.astimezone(TZ).date()
+        if day - timedelta(days=1) < self.start or day + timedelta(days=1) > self.end:
+            self._build(min(self.start, day - timedelta(days=7)), max(self.end, day + timedelta(days=7)))
+
+    def most_recent_due(self, now: datetime) -> tuple[str, datetime]:
+        """The latest draw whose result should be published by now (scheduled + GRACE <= now)."""
+        self._cover(now)
+        i = bisect.bisect_right(self.times, (now - GRACE).timestamp()) - 1
+        _, label, at = self.draws[i]
+        return label, at
+
+    def next_draw(self, now: datetime) -> tuple[str, datetime]:
+        """The first draw scheduled strictly after now."""
+        self._cover(now)
+        i = bisect.bisect_right(self.times, now.timestamp())
+        _, label, at = self.draws[i]
+        return label, at
+
+    def due_since(self, after: datetime, now: datetime) -> list[tuple[str, datetime]]:
+        """Draws scheduled after `after` whose results are due by now, oldest first."""
+        self._cover(now)
+        lo = bisect.bisect_right(self.times, after.timestamp())
+        hi = bisect.bisect_right(self.times, (now - GRACE).timestamp())
+        return [(label, at) for _, label, at in self.draws[lo:hi]]
+
+    def next_due(self, now: datetime) -> tuple[str, datetime]:
+        """The first draw whose result is not yet due (scheduled + GRACE > now)."""
+        self._cover(now)
+        i = bisect.bisect_right(self.times, (now - GRACE).timestamp())
+        _, label, at = self.draws[i]
+        return label, at
+
+
+_calendar = None
+
+
+def calendar() -> DrawCalendar:
+    """Shared calendar for the last year and the week ahead."""
+    global _calendar
+    if _calendar is None:
+        today = datetime.now(TZ).date()
+        _calendar = DrawCalendar(today - timedelta(days=366), today + timedelta(days=7))
+    return _calendar
+
+
+def expected_keys(start: date, end: date) -> np.ndarray:
+    """history_store.slot_keys-compatible keys for every scheduled draw in [start, end]."""
+    days = np.arange(start.toordinal(), end.toordinal() + 1, dtype=np.int64)
+    slots = np.array([history_store.SLOT_INDEX[label] for label in SLOTS], dtype=np.int64)
+    return (days[:, None] * 4 + slots[None, :]).ravel()
+
+
+def missing_draws(cols, start: date | None = None, end: date | None = None, now: datetime | None = None):
+    """
+    (date, label) for every scheduled draw in [start, end] absent from the
+    history. start defaults to the first date in the history; end to the
+    most recent due draw.
+    """
+    now = now or datetime.now(TZ)
+    due_label, due_at = calendar().most_recent_due(now)
+    if start is None:
+        if not len(cols):
+            return []
+        start = date.fromordinal(int(cols.date[0]))
+    end = due_at.date() if end is None else end
+    expected = expected_keys(start, end)
+    # Draws later today that are not due yet are not missing.
+    expected = expected[expected <= due_at.date().toordinal() * 4 + history_store.SLOT_INDEX[due_label]]
+    missing = expected[~np.isin(expected, history_store.slot_keys(cols))]
+    return [(date.fromordinal(int(k // 4)), history_store.DRAW_SLOTS[int(k % 4)]) for k in missing]
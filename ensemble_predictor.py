@@ -1 +1,240 @@
+#!/usr/bin/env python3
+# ensemble_predictor.py
+"""
+Runs every registered strategy against the same read-only history columns,
+each producing a 1000-element score vector (index = triplet 000-999), and
+blends them with per-strategy weights into one ranking.
 
+Strategies run in a thread pool by default, or in a process pool where each
+worker memory-maps the columnar store instead of receiving a copy. Each
+strategy's vector is cached in memory and under data/ensemble_cache/ keyed
+by the history version, so only strategies whose input changed are re-run.
+
+    python ensemble_predictor.py --top 10 --weight transition=2 --processes
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+import history_store
+import metrics
+import predictor
+from strategies import drawtime_model, frequency_matrix, history_index, repeat_analyzer, transition_matrix
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data/ensemble_cache")
+
+STRATEGY_SECONDS = metrics.histogram("cash3_strategy_seconds", "Strategy scoring time, by strategy")
+STRATEGY_CACHE = metrics.counter("cash3_strategy_cache", "Strategy score cache lookups, by result")
+
+
+@dataclass(frozen=True)
+class Strategy:
+    name: str
+    score: Callable  # HistoryColumns (, HistoryIndex) -> np.ndarray of 1000 scores
+    weight: float = 1.0
+    indexed: bool = False  # also takes the shared HistoryIndex of the columns
+
+
+STRATEGIES: dict[str, Strategy] = {}
+
+
+def register(name: str, weight: float = 1.0, indexed: bool = False):
+    """Decorator adding a cols -> scores (or cols, index -> scores) function to the ensemble."""
+    def wrap(fn):
+        STRATEGIES[name] = Strategy(name, fn, weight, indexed)
+        return fn
+    return wrap
+
+
+def _next_slot(cols) -> int:
+    return (int(cols.draw[-1]) + 1) % len(history_store.DRAW_SLOTS) if len(cols) else 0
+
+
+@register("frequency", indexed=True)
+def frequency_scores(cols, index):
+    return frequency_matrix.score(index, window=100)
+
+
+@register("repeat", weight=0.5, indexed=True)
+def repeat_scores(cols, index):
+    return repeat_analyzer.score(index)
+
+
+@register("transition")
+def transition_scores(cols):
+    return transition_matrix.TransitionMatrix.from_columns(cols).score()
+
+
+@register("drawtime")
+def drawtime_scores(cols):
+    return drawtime_model.SlotPartitions.from_columns(cols).score(_next_slot(cols))
+
+
+@register("hot_triplets")
+def hot_triplet_scores(cols):
+    """predictor.py's most-common-triplets heuristic as smoothed triplet frequencies."""
+    d1, d2, d3 = predictor.select(cols)
+    return frequency_matrix.smoothed(np.bincount(d1.astype(np.intp) * 100 + d2.astype(np.intp) * 10 + d3, minlength=1000))
+
+
+def _normalized(scores) -> np.ndarray:
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.shape != (1000,):
+        raise ValueError(f"strategy returned shape {scores.shape}, expected (1000,)")
+    total = scores.sum()
+    return scores / total if total > 0 else np.full(1000, 1 / 1000)
+
+
+def _run(name, cols=None, directory=None, csv_path=None, index=None):
+    """
+    Runs one strategy. Process workers given paths memory-map the columns
+    themselves and also return the version of what they loaded (else None).
+    Indexed strategies use `index`, or the process's shared index when none is given.
+    """
+    version = None
+    if cols is None:
+        cols = history_store.load_columns(directory, csv_path)
+        version = history_store.history_version(cols)
+    strategy = STRATEGIES[name]
+    start = time.perf_counter()
+    if strategy.indexed:
+        scores = strategy.score(cols, index if index is not None else history_index.shared(cols))
+    else:
+        scores = strategy.score(cols)
+    scores = _normalized(scores)
+    return name, scores, time.perf_counter() - start, version
+
+
+class ScoreCache:
+    def __init__(self, directory: Path | None = CACHE_DIR):
+        self.directory = directory
+        self.memory = {}
+
+    def get(self, name: str, version: str):
+        if (name, version) in self.memory:
+            return self.memory[(name, version)]
+        if self.directory is None:
+            return None
+        try:
+            with np.load(self.directory / f"{name}.npz") as data:
+                if str(data["version"]) != version:
+                    return None
+                scores = data["scores"].copy()
+        except (OSError, KeyError, ValueError):
+            return None
+        self.memory[(name, version)] = scores
+        return scores
+
+    def put(self, name: str, version: str, scores: np.ndarray):
+        self.memory = {k: v for k, v in self.memory.items() if k[0] != name}
+        self.memory[(name, version)] = scores
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{name}.npz.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, version=version, scores=scores)
+        os.replace(tmp, self.directory / f"{name}.npz")
+
+
+_cache = ScoreCache()
+
+
+def run(cols=None, names=None, weights=None, top=10, processes=False, workers=None,
+        cache: ScoreCache | None = None, directory=history_store.COLUMNS_DIR, csv_path=history_store.HISTORY_PATH):
+    """
+    Scores the next draw with every strategy in `names` (default: all) and
+    blends them. Returns {"version", "ranking": [("790", score), ...],
+    "scores": blended vector, "timings": {name: seconds}, "cached": [names]}.
+    """
+    cache = _cache if cache is None else cache
+    # Caller-supplied columns may not match the store, so workers get a copy of them instead.
+    from_store = cols is None
+    if from_store:
+        cols = history_store.load_columns(directory, csv_path)
+    names = list(STRATEGIES) if names is None else list(names)
+    weights = {name: STRATEGIES[name].weight for name in names} | dict(weights or {})
+    version = history_store.history_version(cols)
+
+    vectors, timings, cached = {}, {}, []
+    for name in names:
+        hit = cache.get(name, version)
+        if hit is not None:
+            vectors[name] = hit
+            cached.append(name)
+            STRATEGY_CACHE.inc(result="hit")
+    pending = [name for name in names if name not in vectors]
+    if pending:
+        if processes:
+            # Workers re-open the memory-mapped store rather than pickling the columns.
+            job = (None, directory, csv_path) if from_store else (cols,)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_run, name, *job) for name in pending]
+                results = [f.result() for f in futures]
+        else:
+            # Built (or extended) once here, then shared read-only by the indexed strategies' threads.
+            index = history_index.shared(cols) if any(STRATEGIES[name].indexed for name in pending) else None
+            with ThreadPoolExecutor(max_workers=workers or len(pending)) as pool:
+                results = list(pool.map(lambda name: _run(name, cols, index=index), pending))
+        for name, scores, seconds, loaded in results:
+            vectors[name], timings[name] = scores, seconds
+            # Timed inside the worker; recorded here so process-pool runs count too.
+            STRATEGY_SECONDS.observe(seconds, strategy=name)
+            STRATEGY_CACHE.inc(result="miss")
+            if loaded is not None and loaded != version:
+                # The store was rewritten between our load and the worker's.
+                logger.warning("Strategy %s scored history %s, not %s; not caching", name, loaded, version)
+                continue
+            cache.put(name, version, scores)
+            logger.info("Strategy %s took %.3fs", name, seconds)
+
+    total_weight = sum(weights[name] for name in names) or 1.0
+    blended = sum(weights[name] * vectors[name] for name in names) / total_weight
+    best = np.argsort(-blended, kind="stable")[:top]
+    return {
+        "version": version,
+        "ranking": [(f"{code:03d}", float(blended[code])) for code in best],
+        "scores": blended,
+        "timings": timings,
+        "cached": cached,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blend all Cash3 strategies into one ranking.")
+    parser.add_argument("--top", "-n", type=int, default=10)
+    parser.add_argument("--strategy", "-s", action="append", choices=sorted(STRATEGIES),
+                        help="Run only these strategies (repeatable).")
+    parser.add_argument("--weight", action="append", default=[], metavar="NAME=W", help="Override a strategy weight.")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of threads.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    weights = {}
+    for item in args.weight:
+        name, sep, value = item.partition("=")
+        if not sep or name not in STRATEGIES:
+            parser.error(f"--weight expects NAME=W with NAME one of {', '.join(sorted(STRATEGIES))}, got {item!r}")
+        try:
+            weights[name] = float(value)
+        except ValueError:
+            parser.error(f"--weight {item!r}: {value!r} is not a number")
+    result = run(names=args.strategy, weights=weights, top=args.top, processes=args.processes)
+    for name, seconds in result["timings"].items():
+        print(f"⏱️ {name}: {seconds * 1000:.1f} ms")
+    if result["cached"]:
+        print(f"♻️ Cached: {', '.join(result['cached'])}")
+    print("🎯 " + ", ".join(f"{code} ({score:.4f})" for code, score in result["ranking"]))
+
+
+if __name__ == "__main__":
+    main()
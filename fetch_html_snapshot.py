@@ -3,10 +3,13 @@ import asyncio
 from pathlib import Path
 from playwright.async_api import async_playwright
 from config import LATEST_HTML
+import fingerprints
 
 URL = "https://www.lotterypost.com/results/georgia/cash-3"  # or official page
+FINGERPRINT_KEY = f"snapshot:{URL}"
 
 async def snapshot():
+    """Returns True only if the rendered page differs from the stored snapshot."""
     async with async_playwright() as p:
         browser = await p.chromium.launch()
         page = await browser.new_page()
@@ -14,9 +17,18 @@ async def snapshot():
         # Optional: wait for expected DOM element with JS rendered results
         await page.wait_for_timeout(2000)  # small delay to ensure JS runs
         content = await page.content()
-        LATEST_HTML.parent.mkdir(parents=True, exist_ok=True)
-        LATEST_HTML.write_text(content, encoding="utf-8")
         await browser.close()
 
+    digest = fingerprints.sha256_bytes(content.encode("utf-8"))
+    if LATEST_HTML.exists() and fingerprints.matches(FINGERPRINT_KEY, digest):
+        print("ℹ️ HTML snapshot unchanged; not rewriting", LATEST_HTML)
+        return False
+    LATEST_HTML.parent.mkdir(parents=True, exist_ok=True)
+    tmp = LATEST_HTML.with_name(LATEST_HTML.name + ".tmp")
+    tmp.write_text(content, encoding="utf-8")
+    tmp.replace(LATEST_HTML)
+    fingerprints.record(FINGERPRINT_KEY, sha256=digest)
+    return True
+
 if __name__ == "__main__":
     asyncio.run(snapshot())
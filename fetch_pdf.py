@@ -3,24 +3,44 @@ import requests
 import os
 from datetime import datetime
 
+import fingerprints
+
 # TODO: Replace this with the real, stable PDF URL if known.
 PDF_URL = "https://www.galottery.com/content/dam/ga-lottery/pdfs/instant-games/GA_Lottery_WinningNumbers.pdf"
 LOCAL_PATH = "data/latest.pdf"
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+FINGERPRINT_KEY = f"download:{PDF_URL}"
 
 def download_pdf():
+    """Returns True only if a new PDF was written to LOCAL_PATH."""
     os.makedirs(os.path.dirname(LOCAL_PATH), exist_ok=True)
+    headers = dict(HEADERS)
+    if os.path.exists(LOCAL_PATH):
+        headers.update(fingerprints.conditional_headers(FINGERPRINT_KEY))
     try:
-        resp = requests.get(PDF_URL, headers=HEADERS, timeout=15)
+        resp = requests.get(PDF_URL, headers=headers, timeout=15)
+        if resp.status_code == 304:
+            print("ℹ️ PDF not modified on server (304); keeping local copy.")
+            return False
         resp.raise_for_status()
     except Exception as e:
         print("❌ PDF download failed:", e)
         return False
 
-    # Simple change detection could be added here (e.g., compare bytes or headers)
+    digest = fingerprints.sha256_bytes(resp.content)
+    validators = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+    if os.path.exists(LOCAL_PATH) and fingerprints.sha256_file(LOCAL_PATH) == digest:
+        fingerprints.record(FINGERPRINT_KEY, sha256=digest, **validators)
+        print("ℹ️ PDF content unchanged; keeping local copy.")
+        return False
+
     with open(LOCAL_PATH + ".tmp", "wb") as f:
         f.write(resp.content)
     os.replace(LOCAL_PATH + ".tmp", LOCAL_PATH)
+    fingerprints.record(FINGERPRINT_KEY, sha256=digest, **validators)
     print(f"✅ PDF downloaded at {datetime.utcnow().isoformat()}Z")
     return True
 
@@ -0,0 +1,68 @@
+# fingerprints.py
+"""
+Small JSON store of content hashes and HTTP validators (ETag/Last-Modified)
+so fetchers can send conditional GETs and the pipeline can skip inputs it
+has already processed.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+FINGERPRINT_PATH = Path("data/fingerprints.json")
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path, chunk_size: int = 1 << 20) -> str | None:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def load(path: Path = FINGERPRINT_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get(key: str, path: Path = FINGERPRINT_PATH) -> dict:
+    return load(path).get(key, {})
+
+
+def record(key: str, path: Path = FINGERPRINT_PATH, **fields):
+    """Stores fields for key (None values are dropped) and stamps the time."""
+    store = load(path)
+    entry = {k: v for k, v in fields.items() if v is not None}
+    entry["recorded_at"] = datetime.now(timezone.utc).isoformat()
+    store[key] = entry
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(store, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def conditional_headers(key: str, path: Path = FINGERPRINT_PATH) -> dict:
+    """If-None-Match / If-Modified-Since headers from the last response for key."""
+    entry = get(key, path)
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def matches(key: str, digest: str | None, path: Path = FINGERPRINT_PATH) -> bool:
+    return digest is not None and get(key, path).get("sha256") == digest
@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+"""
+Picked up automatically by `gunicorn app:app` from the working directory.
+
+The app is imported once in the master and the summary/history caches are
+loaded there before workers fork, so every worker starts warm and shares
+the loaded data copy-on-write instead of parsing it again.
+"""
+preload_app = True
+
+
+def when_ready(server):
+    import data_store
+    import history_store
+
+    # Workers only read the columnar store; bring it up to date once, here.
+    history_store.refresh_columns()
+    data_store.warm()
+    server.log.info("Data caches warmed in master: %s", data_store.cache_stats())
@@ -0,0 +1,547 @@
+# history_store.py
+"""
+Columnar binary copy of the draw history.
+
+Each column is a plain .npy file so readers can memory-map it without
+parsing text. Rows are sorted by (date, draw slot). Every write goes to a
+fresh version directory under data/history_columns/ and is published by
+atomically replacing the `current` pointer file, so a reader always maps
+one consistent set of columns. Writers hold a lock file next to the store
+for the whole CSV + columns update.
+
+The CSV stays the human-readable export. Readers never write: if the store
+is missing or older than the CSV (the signature in meta.json), they wait
+for a writer in progress, then parse the CSV in memory; refresh_columns()
+rebuilds the store for writers and at startup.
+
+New draws go through append_draws(), which appends to the CSV instead of
+rewriting it; corrections to existing draws go through apply_corrections().
+
+Only numpy is imported up front: readers of the columns (the web app) never
+load pandas, which is imported on the paths that parse or write CSV.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the store is then unlocked
+    fcntl = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = Path("data/ga_cash3_history.csv")
+COLUMNS_DIR = Path("data/history_columns")
+# File in COLUMNS_DIR naming the published version directory.
+CURRENT_POINTER = "current"
+# Published versions whose digests meta.json remembers (see history_version).
+CHAIN_LENGTH = 256
+
+DRAW_SLOTS = ("Midday", "Evening", "Night")
+SLOT_INDEX = {name: i for i, name in enumerate(DRAW_SLOTS)}
+DIGIT_COLUMNS = ["Digit1", "Digit2", "Digit3"]
+
+COLUMN_DTYPES = {
+    "date": np.int32,  # proleptic Gregorian ordinal (date.toordinal())
+    "draw": np.uint8,  # index into DRAW_SLOTS
+    "d1": np.uint8,
+    "d2": np.uint8,
+    "d3": np.uint8,
+}
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@dataclass(frozen=True)
+class HistoryColumns:
+    date: np.ndarray
+    draw: np.ndarray
+    d1: np.ndarray
+    d2: np.ndarray
+    d3: np.ndarray
+    # ((rows, digest), ...) of the store's published versions that these
+    # columns extend, oldest first; empty for columns not loaded from the store.
+    chain: tuple = ()
+
+    def __len__(self):
+        return len(self.date)
+
+    def take(self, index):
+        """New columns holding the rows selected by a slice, mask or index array (without the chain)."""
+        return HistoryColumns(**{name: np.asarray(getattr(self, name))[index] for name in COLUMN_DTYPES})
+
+    @classmethod
+    def empty(cls):
+        return cls(**{name: np.empty(0, dtype=dt) for name, dt in COLUMN_DTYPES.items()})
+
+
+def _csv_signature(csv_path: Path):
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _frame_keys(df: pd.DataFrame):
+    """(date ordinals, slot indexes) of a typed frame, in row order."""
+    ordinals = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    return ordinals, df["Draw"].cat.codes.to_numpy(dtype=np.int64)
+
+
+def frame_to_columns(df: pd.DataFrame) -> HistoryColumns:
+    """
+    Converts a history frame into sorted columns. Typed frames (see
+    normalize.py) convert directly; anything else goes through
+    normalize.clean() first, which drops unusable rows.
+    """
+    import normalize
+
+    if not normalize.is_typed(df):
+        df = normalize.clean(df)
+    if df.empty:
+        return HistoryColumns.empty()
+
+    ordinals, slot_arr = _frame_keys(df)
+    digit_arr = df[DIGIT_COLUMNS].to_numpy(dtype=np.uint8)
+    order = np.lexsort((slot_arr, ordinals))
+    return HistoryColumns(
+        date=ordinals[order].astype(np.int32),
+        draw=slot_arr[order].astype(np.uint8),
+        d1=digit_arr[order, 0],
+        d2=digit_arr[order, 1],
+        d3=digit_arr[order, 2],
+    )
+
+
+def columns_to_frame(cols: HistoryColumns) -> pd.DataFrame:
+    """Date (ISO string), Draw, Digit1-3 frame in (date, draw) order."""
+    import pandas as pd
+
+    days = np.asarray(cols.date, dtype=np.int64) - _EPOCH_ORDINAL
+    return pd.DataFrame({
+        "Date": days.astype("datetime64[D]").astype(str),
+        "Draw": np.array(DRAW_SLOTS, dtype=object)[np.asarray(cols.draw, dtype=np.intp)],
+        "Digit1": np.asarray(cols.d1, dtype=np.int64),
+        "Digit2": np.asarray(cols.d2, dtype=np.int64),
+        "Digit3": np.asarray(cols.d3, dtype=np.int64),
+    })
+
+
+def columns_to_records(cols: HistoryColumns) -> list[dict]:
+    """Same rows as columns_to_frame() as plain dicts, without pandas."""
+    days = (np.asarray(cols.date, dtype=np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]").astype(str).tolist()
+    names = [DRAW_SLOTS[slot] for slot in np.asarray(cols.draw).tolist()]
+    return [
+        {"Date": day, "Draw": name, "Digit1": a, "Digit2": b, "Digit3": c}
+        for day, name, a, b, c in zip(days, names, np.asarray(cols.d1).tolist(),
+                                      np.asarray(cols.d2).tolist(), np.asarray(cols.d3).tolist())
+    ]
+
+
+_lock_state = threading.local()
+
+
+@contextmanager
+def store_lock(directory: Path = COLUMNS_DIR, exclusive: bool = True):
+    """
+    Advisory lock on the columnar store (a .lock file next to it). Writers
+    hold it exclusively across the CSV and columns update; readers take it
+    shared to wait out a writer. Re-entrant within a thread.
+    """
+    directory = Path(directory)
+    path = directory.with_name(directory.name + ".lock")
+    held = getattr(_lock_state, "held", None)
+    if held is None:
+        held = _lock_state.held = set()
+    key = os.path.abspath(path)
+    if fcntl is None or key in held:
+        yield
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(path, "a")
+    except OSError as e:
+        if exclusive:
+            raise
+        logger.debug("Cannot open %s (%s); reading without waiting for writers", path, e)
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _published(directory: Path) -> str | None:
+    try:
+        return (directory / CURRENT_POINTER).read_text().strip() or None
+    except OSError:
+        return None
+
+
+def _prune(directory: Path, keep: set):
+    """Removes unpublished or superseded versions, and the old single-directory layout."""
+    for entry in directory.iterdir():
+        if entry.is_dir() and entry.name.startswith("v-") and entry.name not in keep:
+            shutil.rmtree(entry, ignore_errors=True)
+        elif entry.suffix in (".npy", ".tmp") or entry.name == "meta.json":
+            entry.unlink(missing_ok=True)
+
+
+def write_columns(cols: HistoryColumns, directory: Path = COLUMNS_DIR, csv_path: Path = HISTORY_PATH):
+    """
+    Writes every column and the CSV signature to a new version directory
+    and publishes it with one atomic replace of the pointer file.
+    """
+    directory = Path(directory)
+    with store_lock(directory):
+        directory.mkdir(parents=True, exist_ok=True)
+        version = Path(tempfile.mkdtemp(prefix="v-", dir=directory))
+        os.chmod(version, 0o755)
+        for name in COLUMN_DTYPES:
+            with open(version / f"{name}.npy", "wb") as f:
+                np.save(f, np.ascontiguousarray(getattr(cols, name), dtype=COLUMN_DTYPES[name]))
+        chain = cols.chain if cols.chain and cols.chain[-1][0] == len(cols) else ((len(cols), history_version(cols)),)
+        meta = {"rows": len(cols), "csv_signature": _csv_signature(csv_path), "chain": [list(c) for c in chain]}
+        (version / "meta.json").write_text(json.dumps(meta))
+        previous = _published(directory)
+        tmp = directory / f"{CURRENT_POINTER}.{version.name}.tmp"
+        tmp.write_text(version.name)
+        os.replace(tmp, directory / CURRENT_POINTER)
+        # The previous version stays for readers that just resolved the pointer;
+        # readers that already mapped older files keep them until they close.
+        _prune(directory, {version.name, previous})
+    logger.info("Wrote %s draws to columnar store %s", len(cols), version)
+
+
+DRAWS_APPENDED = metrics.counter("cash3_draws_appended", "New draws appended to the history")
+
+
+@metrics.timed("cash3_history_write_seconds", "History merge/write time, by operation", op="rewrite")
+def write_history(df: pd.DataFrame, csv_path: Path = HISTORY_PATH, directory: Path = COLUMNS_DIR):
+    """Rewrites the CSV export atomically and refreshes the columnar store from the same frame."""
+    import normalize
+
+    if not normalize.is_typed(df):
+        df = normalize.clean(df)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = csv_path.with_name(csv_path.name + ".tmp")
+    normalize.to_csv_frame(df).to_csv(tmp, index=False)
+    with store_lock(directory):
+        os.replace(tmp, csv_path)
+        write_columns(frame_to_columns(df), directory, csv_path)
+
+
+def slot_keys(cols: HistoryColumns) -> np.ndarray:
+    """One sortable int64 per (date, slot); ascending for date-sorted columns."""
+    return np.asarray(cols.date, dtype=np.int64) * 4 + np.asarray(cols.draw, dtype=np.int64)
+
+
+def _digest(cols: HistoryColumns, start: int, stop: int, prev: str = "") -> str:
+    """Hash of rows start..stop chained onto the digest of the rows before them."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(prev.encode())
+    for name, dtype in COLUMN_DTYPES.items():
+        h.update(np.ascontiguousarray(np.asarray(getattr(cols, name), dtype=dtype)[start:stop]).tobytes())
+    return h.hexdigest()
+
+
+def history_version(cols: HistoryColumns, n: int | None = None) -> str:
+    """
+    Content hash of the first n rows (default: all); changes whenever any of
+    those draws does. Published versions of the store are chained, each
+    digest covering the previous one plus the appended rows, so columns
+    loaded from the store look theirs up in O(1); other prefixes are hashed.
+    A prefix hashed both ways gets two different digests, which only costs
+    the caller a rebuild.
+    """
+    n = len(cols) if n is None else n
+    for rows, digest in reversed(cols.chain):
+        if rows == n:
+            return digest
+    return _digest(cols, 0, n)
+
+
+def _extend_chain(base: HistoryColumns, merged: HistoryColumns) -> tuple:
+    """Chain for merged = base plus rows appended after it, hashing only the new rows."""
+    if base.chain and base.chain[-1][0] == len(base):
+        link = (len(merged), _digest(merged, len(base), len(merged), base.chain[-1][1]))
+        return (base.chain + (link,))[-CHAIN_LENGTH:]
+    return ((len(merged), _digest(merged, 0, len(merged))),)
+
+
+def is_prefix(n: int, version: str | None, cols: HistoryColumns) -> bool:
+    """
+    True if state built from n rows with content hash `version` covers the
+    first n rows of cols, i.e. cols only appended draws since. A corrected
+    digit changes the hash even though the last (date, slot) stays the same.
+    """
+    if n == 0:
+        return True
+    if version is None or n > len(cols):
+        return False
+    return history_version(cols, n) == version
+
+
+def _concat(a: HistoryColumns, b: HistoryColumns) -> HistoryColumns:
+    merged = HistoryColumns(**{
+        name: np.concatenate([np.asarray(getattr(a, name)), np.asarray(getattr(b, name))])
+        for name in COLUMN_DTYPES
+    })
+    if len(a) and len(b) and slot_keys(b)[0] < slot_keys(a)[-1]:
+        # Backfilled draws older than the newest one; restore (date, slot) order.
+        merged = merged.take(np.argsort(slot_keys(merged), kind="stable"))
+    return merged
+
+
+def _digits(cols: HistoryColumns) -> np.ndarray:
+    return np.stack([cols.d1, cols.d2, cols.d3], axis=1)
+
+
+def append_csv_rows(path: Path, df: pd.DataFrame):
+    """
+    Appends rows to a CSV in its existing column order with a single write,
+    writing the header only when the file is new or empty. Rows with columns
+    the header lacks (e.g. a newly added strategy) rewrite the file once
+    with those columns added at the end, left empty in the older rows.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = None
+    needs_newline = False
+    if path.exists() and path.stat().st_size:
+        with open(path, "rb") as f:
+            first = f.readline().decode("utf-8").strip()
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        header = first.split(",") if first else None
+    if header and (added := [c for c in df.columns if c not in header]):
+        _rewrite_with_columns(path, df, header, added)
+        return
+    columns = header or list(df.columns)
+    text = df.reindex(columns=columns).to_csv(index=False, header=header is None)
+    # A blank placeholder file is replaced rather than appended to.
+    with open(path, "a" if header else "w", encoding="utf-8", newline="") as f:
+        f.write(("\n" if needs_newline and header else "") + text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _rewrite_with_columns(path: Path, df: pd.DataFrame, header: list, added: list):
+    import pandas as pd
+
+    logger.info("Adding columns %s to %s", ", ".join(added), path)
+    # Existing values are kept verbatim as text.
+    old = pd.read_csv(path, dtype=str, keep_default_na=False)
+    tmp = path.with_name(path.name + ".tmp")
+    pd.concat([old, df], ignore_index=True).reindex(columns=header + added).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+@metrics.timed("cash3_history_write_seconds", op="append")
+def append_draws(new_df: pd.DataFrame, csv_path: Path = HISTORY_PATH, directory: Path = COLUMNS_DIR):
+    """
+    Appends only (Date, Draw) slots not already in the history. The columnar
+    store doubles as the key index, so the CSV is never re-read; the cost is
+    proportional to the new rows plus a binary copy of the columns.
+
+    Slots that exist with different digits are not touched; they are returned
+    as a frame so the caller can pass them to apply_corrections().
+    Returns (appended_count, conflicts_df).
+    """
+    import normalize
+    import pandas as pd
+
+    csv_path, directory = Path(csv_path), Path(directory)
+    # clean() keeps the first occurrence of each slot and sorts, so typed rows
+    # and incoming columns stay aligned.
+    typed = normalize.clean(new_df)
+    incoming = frame_to_columns(typed)
+    if not len(incoming):
+        return 0, pd.DataFrame(columns=["Date", "Draw", *DIGIT_COLUMNS])
+
+    with store_lock(directory):
+        return _append_locked(typed, incoming, csv_path, directory)
+
+
+def _append_locked(typed, incoming: HistoryColumns, csv_path: Path, directory: Path):
+    import normalize
+
+    # A stale store reads the CSV here, so the columns written below match it either way.
+    existing = load_columns(directory, csv_path)
+    existing_keys = slot_keys(existing)
+    new_keys = slot_keys(incoming)
+    pos = np.searchsorted(existing_keys, new_keys)
+    found = pos < len(existing_keys)
+    found[found] = existing_keys[pos[found]] == new_keys[found]
+
+    differs = np.zeros(len(incoming), dtype=bool)
+    if found.any():
+        differs[found] = (_digits(existing)[pos[found]] != _digits(incoming)[found]).any(axis=1)
+    conflicts = columns_to_frame(incoming.take(differs))
+    if len(conflicts):
+        logger.warning("%s incoming draws disagree with history; use apply_corrections() to update them", len(conflicts))
+
+    fresh = incoming.take(~found)
+    if not len(fresh):
+        return 0, conflicts
+    fresh_rows = typed[~found]
+    if not csv_path.exists():
+        write_history(fresh_rows, csv_path, directory)
+    else:
+        append_csv_rows(csv_path, normalize.to_csv_frame(fresh_rows))
+        merged = _concat(existing, fresh)
+        if not len(existing) or slot_keys(fresh)[0] > existing_keys[-1]:
+            # Appended after the newest draw: chain the version instead of rehashing the history.
+            merged = replace(merged, chain=_extend_chain(existing, merged))
+        write_columns(merged, directory, csv_path)
+    DRAWS_APPENDED.inc(len(fresh))
+    logger.info("Appended %s new draws to %s", len(fresh), csv_path)
+    return len(fresh), conflicts
+
+
+@metrics.timed("cash3_history_write_seconds", op="corrections")
+def apply_corrections(corrections: pd.DataFrame, csv_path: Path = HISTORY_PATH, directory: Path = COLUMNS_DIR):
+    """
+    Overwrites the digits of existing (Date, Draw) slots. This is the only
+    path that rewrites the whole CSV; it is meant for rare published fixes.
+    Returns the number of rows changed.
+    """
+    import normalize
+
+    fixes = normalize.clean(corrections)
+    if fixes.empty or not Path(csv_path).exists():
+        return 0
+    with store_lock(directory):
+        return _correct_locked(fixes, csv_path, directory)
+
+
+def _correct_locked(fixes, csv_path: Path, directory: Path) -> int:
+    import normalize
+    import pandas as pd
+
+    df = normalize.read_history(csv_path)
+    ordinals, slots = _frame_keys(fixes)
+    by_key = fixes.set_index(pd.Index(ordinals * 4 + slots))
+    ordinals, slots = _frame_keys(df)
+    row_keys = pd.Series(ordinals * 4 + slots, index=df.index)
+    hit = row_keys.isin(by_key.index)
+    for col in DIGIT_COLUMNS:
+        df.loc[hit, col] = row_keys[hit].map(by_key[col]).to_numpy(dtype=np.uint8)
+    changed = int(hit.sum())
+    if changed:
+        write_history(df, Path(csv_path), Path(directory))
+        logger.info("Applied %s corrections to %s", changed, csv_path)
+        _drop_derived_state()
+    return changed
+
+
+def _drop_derived_state():
+    """Statistics and strategy state counted the old digits; they are rebuilt on next use."""
+    import stats_engine
+    from strategies import drawtime_model, history_index
+
+    stats_engine.STATE_PATH.unlink(missing_ok=True)
+    history_index.reset()
+    drawtime_model.reset()
+
+
+def _load_published(directory: Path, csv_path: Path, mmap: bool) -> HistoryColumns | None:
+    """The published columns if they were derived from the current CSV, else None."""
+    mode = "r" if mmap else None
+    for _ in range(3):
+        name = _published(directory)
+        if name is None:
+            return None
+        version = directory / name
+        try:
+            meta = json.loads((version / "meta.json").read_text())
+            signature = _csv_signature(csv_path)
+            if signature is not None and meta.get("csv_signature") != signature:
+                return None
+            chain = tuple((int(rows), str(digest)) for rows, digest in meta.get("chain", ()))
+            if chain and chain[-1][0] != meta.get("rows"):
+                chain = ()
+            return HistoryColumns(chain=chain, **{
+                col: np.load(version / f"{col}.npy", mmap_mode=mode) for col in COLUMN_DTYPES
+            })
+        except FileNotFoundError:
+            continue  # superseded and pruned after we read the pointer; read it again
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable columnar store %s: %s", version, e)
+            return None
+    return None
+
+
+def _read_csv_columns(csv_path: Path) -> HistoryColumns:
+    import normalize
+
+    return frame_to_columns(normalize.read_history(csv_path))
+
+
+def rebuild_from_csv(csv_path: Path = HISTORY_PATH, directory: Path = COLUMNS_DIR) -> HistoryColumns:
+    with store_lock(directory):
+        logger.info("Rebuilding columnar store from %s", csv_path)
+        cols = _read_csv_columns(csv_path)
+        write_columns(cols, directory, csv_path)
+    return cols
+
+
+def refresh_columns(directory: Path = COLUMNS_DIR, csv_path: Path = HISTORY_PATH) -> HistoryColumns:
+    """
+    Rebuilds the store if it is missing or older than the CSV, then loads it.
+    For writers and process startup; request paths use load_columns().
+    """
+    directory, csv_path = Path(directory), Path(csv_path)
+    with store_lock(directory):
+        if _load_published(directory, csv_path, mmap=True) is None and csv_path.exists():
+            rebuild_from_csv(csv_path, directory)
+    return load_columns(directory, csv_path)
+
+
+def load_columns(directory: Path = COLUMNS_DIR, csv_path: Path = HISTORY_PATH, mmap: bool = True) -> HistoryColumns:
+    """
+    Memory-mapped, read-only view of the published history columns. Never
+    writes: if the store is missing or older than the CSV it waits for a
+    writer in progress, then falls back to parsing the CSV in memory.
+    Returns empty columns if neither exists.
+    """
+    directory, csv_path = Path(directory), Path(csv_path)
+    cols = _load_published(directory, csv_path, mmap)
+    if cols is not None:
+        return cols
+    if not csv_path.exists():
+        return HistoryColumns.empty()
+    with store_lock(directory, exclusive=False):
+        cols = _load_published(directory, csv_path, mmap)
+    if cols is None:
+        logger.info("Columnar store %s is missing or stale; reading %s", directory, csv_path)
+        cols = _read_csv_columns(csv_path)
+    return cols
+
+
+def load_frame(directory: Path = COLUMNS_DIR, csv_path: Path = HISTORY_PATH) -> pd.DataFrame:
+    return columns_to_frame(load_columns(directory, csv_path))
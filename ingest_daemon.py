@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# ingest_daemon.py
+"""
+Resident ingestion service. Computes the next draw from config.DRAW_SCHEDULE,
+sleeps until draw + GRACE, polls the result sources with adaptive backoff
+until that draw is published, then runs ingest -> stats -> summary in this
+process, so imports, the columnar store and the stats state stay warm.
+
+Per-stage timings are logged and written to data/ingest_metrics.json.
+
+    python ingest_daemon.py          # run forever
+    python ingest_daemon.py --once   # handle the most recent due draw and exit
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+import async_fetch
+import draw_calendar
+import history_store
+import metrics
+import prepare_data
+import sources
+import stats_engine
+from config import GRACE
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = Path("data/ingest_metrics.json")
+TZ = draw_calendar.TZ
+
+# Polling after draw + GRACE: first retry after POLL_START, growing by
+# POLL_FACTOR up to POLL_MAX, giving up POLL_DEADLINE after the draw.
+POLL_START = timedelta(minutes=2)
+POLL_FACTOR = 1.5
+POLL_MAX = timedelta(minutes=20)
+POLL_DEADLINE = timedelta(hours=6)
+
+
+STAGE_SECONDS = metrics.histogram("cash3_ingest_stage_seconds", "Ingest daemon stage time, by stage")
+
+
+class StageMetrics:
+    """Wall-clock timings per pipeline stage: count, last, total and max seconds."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = self.stages.setdefault(stage, {"count": 0, "last": 0.0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["last"] = elapsed
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+            STAGE_SECONDS.observe(elapsed, stage=stage)
+            logger.info("stage %-8s %.3fs", stage, elapsed)
+
+    def dump(self, path: Path = METRICS_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps({
+            "updated": datetime.now(TZ).isoformat(),
+            "stages": self.stages,
+        }, indent=2))
+        os.replace(tmp, path)
+
+
+def has_draw(cols, label: str, scheduled: datetime) -> bool:
+    key = scheduled.date().toordinal() * 4 + history_store.SLOT_INDEX[label]
+    keys = history_store.slot_keys(cols)
+    i = keys.searchsorted(key)
+    return bool(i < len(keys) and keys[i] == key)
+
+
+class IngestDaemon:
+    def __init__(self, source_list=None):
+        self.sources = source_list or sources.default_sources()
+        self.metrics = StageMetrics()
+        self.stop = threading.Event()
+
+    def sleep_until(self, when: datetime) -> bool:
+        """Sleeps until `when` (or stop); returns False if stopped."""
+        delay = (when - datetime.now(TZ)).total_seconds()
+        if delay > 0:
+            logger.info("Sleeping %.0fs until %s", delay, when.isoformat())
+        return not self.stop.wait(max(delay, 0))
+
+    def poll(self, label: str, scheduled: datetime) -> list[dict] | None:
+        """
+        Fetches until some source has the target draw, backing off between
+        tries; None if no source publishes it by the deadline.
+        """
+        deadline = scheduled + POLL_DEADLINE
+        wait = POLL_START
+        target = scheduled.date().isoformat()
+
+        def has_target(rows):
+            return any(r["Date"] == target and r["Draw"] == label for r in rows)
+
+        while not self.stop.is_set():
+            with self.metrics.time("fetch"):
+                rows = async_fetch.fetch_first(self.sources, accept=has_target)
+            if rows:
+                return rows
+            if datetime.now(TZ) + wait > deadline:
+                logger.warning("%s %s not published by %s; giving up", label, target, deadline.isoformat())
+                return None
+            logger.info("%s %s not published yet; retrying in %s", label, target, wait)
+            self.stop.wait(wait.total_seconds())
+            wait = min(wait * POLL_FACTOR, POLL_MAX)
+        return None
+
+    def ingest(self, rows: list[dict]):
+        with self.metrics.time("ingest"):
+            appended, _ = history_store.append_draws(pd.DataFrame(rows), csv_path=prepare_data.HISTORY_PATH)
+            cols = history_store.load_columns(csv_path=prepare_data.HISTORY_PATH)
+        with self.metrics.time("stats"):
+            state = stats_engine.sync(cols)
+        with self.metrics.time("summary"):
+            prepare_data.build_summary(cols, state)
+        logger.info("Ingested %s new draws (%s total)", appended, len(cols))
+
+    def handle(self, label: str, scheduled: datetime):
+        # The daemon is a writer: bring the columnar store up to date with the CSV.
+        cols = history_store.refresh_columns(csv_path=prepare_data.HISTORY_PATH)
+        if has_draw(cols, label, scheduled):
+            logger.info("%s %s already in history", label, scheduled.date())
+        else:
+            with self.metrics.time("cycle"):
+                rows = self.poll(label, scheduled)
+                if rows:
+                    self.ingest(rows)
+            self.metrics.dump()
+        self.refresh_dashboard()
+
+    def refresh_dashboard(self):
+        # A draw came due, so the published bundles predict the wrong one even if nothing was ingested.
+        import dashboard
+
+        try:
+            dashboard.refresh()
+        except Exception as e:
+            logger.warning("Dashboard not refreshed; the app will render it live: %s", e)
+
+    def run_once(self):
+        self.handle(*draw_calendar.calendar().most_recent_due(datetime.now(TZ)))
+
+    def run_forever(self):
+        # Start with the draw that came due while we were not running.
+        label, last = draw_calendar.calendar().most_recent_due(datetime.now(TZ))
+        self.handle(label, last)
+        while not self.stop.is_set():
+            # A long poll can outlast the next draw; handle every draw due since the last one.
+            for label, scheduled in draw_calendar.calendar().due_since(last, datetime.now(TZ)):
+                if self.stop.is_set():
+                    return
+                self.handle(label, scheduled)
+                last = scheduled
+            label, scheduled = draw_calendar.calendar().next_due(datetime.now(TZ))
+            logger.info("Next draw: %s at %s", label, scheduled.isoformat())
+            if not self.sleep_until(scheduled + GRACE):
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident GA Cash3 ingestion service.")
+    parser.add_argument("--once", action="store_true", help="Handle the most recent due draw and exit.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    daemon = IngestDaemon()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop.set())
+    if args.once:
+        daemon.run_once()
+    else:
+        daemon.run_forever()
+
+
+if __name__ == "__main__":
+    main()
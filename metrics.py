@@ -0,0 +1,186 @@
+# metrics.py
+"""
+In-process counters and histograms for the pipeline and the web app.
+
+    PDF_PARSE = metrics.histogram("cash3_pdf_parse_seconds", "PDF parse wall time")
+    with PDF_PARSE.time():
+        ...
+
+    @metrics.timed("cash3_summary_build_seconds", "summary.json rebuild")
+    def build_summary(...): ...
+
+render() produces the Prometheus text format served at /metrics; dump()
+writes the same data as JSON. Setting CASH3_METRICS=0 disables recording:
+every call then returns after one flag check. CASH3_METRICS_JSON=<path>
+dumps to that file when a CLI run exits.
+"""
+import atexit
+import bisect
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+ENABLED = os.environ.get("CASH3_METRICS", "1") != "0"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+_registry = {}
+_registry_lock = threading.Lock()
+_NULL = nullcontext()
+
+
+def enable(flag: bool = True):
+    global ENABLED
+    ENABLED = flag
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name, self.help = name, help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}_total{_format_labels(key)} {value}"
+
+    def snapshot(self):
+        return [{"labels": dict(key), "value": value} for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        # label key -> [per-bucket counts, sum, count]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the wall time of its block."""
+        if not ENABLED:
+            return _NULL
+        return self._time(labels)
+
+    @contextmanager
+    def _time(self, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        for key, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {total}"
+            yield f"{self.name}_count{_format_labels(key)} {count}"
+
+    def snapshot(self):
+        return [
+            {"labels": dict(key), "count": count, "sum": total, "mean": total / count if count else 0.0}
+            for key, (_, total, count) in sorted(self.values.items())
+        ]
+
+
+def _get(cls, name, help, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, **kwargs)
+        return metric
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return _get(Counter, name, help)
+
+
+def histogram(name: str, help: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _get(Histogram, name, help, buckets=buckets)
+
+
+def timed(name: str, help: str = "", **labels):
+    """Decorator recording each call's wall time in histogram `name`."""
+    hist = histogram(name, help)
+
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with hist._time(labels):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for name, metric in sorted(_registry.items()):
+        if metric.help:
+            lines.append(f"# HELP {metric.name}{'_total' if metric.kind == 'counter' else ''} {metric.help}")
+        lines.append(f"# TYPE {metric.name}{'_total' if metric.kind == 'counter' else ''} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    return {name: {"type": metric.kind, "values": metric.snapshot()} for name, metric in sorted(_registry.items())}
+
+
+def dump(path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(snapshot(), indent=2))
+    os.replace(tmp, path)
+
+
+if ENABLED and os.environ.get("CASH3_METRICS_JSON"):
+    atexit.register(dump, os.environ["CASH3_METRICS_JSON"])
@@ -0,0 +1,118 @@
+# normalize.py
+"""
+The one place where history rows are coerced into the typed schema:
+
+    Date         datetime64 (midnight, no time zone)
+    Draw         ordered categorical Midday < Evening < Night
+    DrawTime     string
+    Digit1..3    uint8
+    Winners      Int64 (nullable)
+    TotalPayout  Int64 whole dollars (nullable)
+
+Everything that ingests rows (PDF/HTML parsers, update_csv, backfill) goes
+through clean(); read_history() loads the CSV export with explicit dtypes
+so readers never re-coerce.
+"""
+import logging
+
+import pandas as pd
+
+from config import DRAW_TIMES
+from history_store import DIGIT_COLUMNS, DRAW_SLOTS
+
+logger = logging.getLogger(__name__)
+
+DRAW_DTYPE = pd.CategoricalDtype(DRAW_SLOTS, ordered=True)
+HISTORY_COLUMNS = ["Date", "Draw", "DrawTime", *DIGIT_COLUMNS, "Winners", "TotalPayout"]
+
+CSV_DTYPES = {
+    "Draw": DRAW_DTYPE,
+    "DrawTime": "string",
+    **{col: "uint8" for col in DIGIT_COLUMNS},
+    "Winners": "Int64",
+    "TotalPayout": "Int64",
+}
+
+
+def load_raw(path) -> pd.DataFrame:
+    """Reads any history-like CSV as untyped strings, ready for clean()."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _draw_labels(series: pd.Series) -> pd.Series:
+    low = series.astype("string").str.strip().str.lower()
+    labels = pd.Series(pd.NA, index=series.index, dtype="string")
+    labels[low.str.contains("mid", na=False)] = "Midday"
+    labels[low.str.contains("even", na=False)] = "Evening"
+    labels[low.str.contains("night", na=False)] = "Night"
+    return labels.astype(DRAW_DTYPE)
+
+
+def _money_to_int(series: pd.Series) -> pd.Series:
+    """'$76,295 ' / '1,048' / 1048.0 -> 76295 / 1048 as nullable Int64."""
+    digits = series.astype("string").str.replace(r"[$,\s]", "", regex=True).replace("", pd.NA)
+    return pd.to_numeric(digits, errors="coerce").round().astype("Int64")
+
+
+def clean(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the typed history frame: rows without a valid date, draw or
+    three 0-9 digits are dropped, (Date, Draw) duplicates keep their first
+    occurrence, and rows are sorted by date then draw order.
+    """
+    if df is None or df.empty or not {"Date", "Draw", *DIGIT_COLUMNS}.issubset(df.columns):
+        return pd.DataFrame({col: pd.Series(dtype=CSV_DTYPES.get(col, "datetime64[ns]")) for col in HISTORY_COLUMNS})
+
+    out = pd.DataFrame(index=df.index)
+    out["Date"] = pd.to_datetime(df["Date"], errors="coerce", format="mixed").dt.normalize()
+    out["Draw"] = _draw_labels(df["Draw"])
+    digits = df[DIGIT_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    valid = out["Date"].notna() & out["Draw"].notna() & digits.notna().all(axis=1)
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+    dropped = int((~valid).sum())
+    if dropped:
+        logger.warning("Dropping %s rows with missing date/draw/digits", dropped)
+
+    for col in DIGIT_COLUMNS:
+        out[col] = digits[col]
+    drawtime = df["DrawTime"].astype("string").str.strip() if "DrawTime" in df else pd.Series(pd.NA, index=df.index, dtype="string")
+    out["DrawTime"] = drawtime.replace("", pd.NA).fillna(out["Draw"].map(DRAW_TIMES).astype("string"))
+    for col in ("Winners", "TotalPayout"):
+        out[col] = _money_to_int(df[col]) if col in df else pd.Series(pd.NA, index=df.index, dtype="Int64")
+
+    out = out[valid]
+    out = out.drop_duplicates(subset=["Date", "Draw"], keep="first")
+    out = out.sort_values(by=["Date", "Draw"], kind="stable").reset_index(drop=True)
+    out = out[HISTORY_COLUMNS].astype({col: CSV_DTYPES[col] for col in DIGIT_COLUMNS + ["DrawTime"]})
+    return out
+
+
+def to_csv_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Typed frame -> frame for the CSV export (ISO dates)."""
+    out = df.copy()
+    out["Date"] = out["Date"].dt.strftime("%Y-%m-%d")
+    return out
+
+
+def is_typed(df: pd.DataFrame) -> bool:
+    return (
+        "Date" in df and pd.api.types.is_datetime64_any_dtype(df["Date"])
+        and "Draw" in df and df["Draw"].dtype == DRAW_DTYPE
+        and all(col in df and df[col].dtype == "uint8" for col in DIGIT_COLUMNS)
+    )
+
+
+def read_history(path) -> pd.DataFrame:
+    """
+    Loads the CSV export with explicit dtypes. Files written before
+    normalization (e.g. '8/1/25' dates, quoted '$76,295 ' payouts) fail the
+    strict read and go through clean() instead.
+    """
+    try:
+        df = pd.read_csv(path, dtype=CSV_DTYPES, parse_dates=["Date"], date_format="%Y-%m-%d")
+        if is_typed(df) and df["Draw"].notna().all():
+            return df.reindex(columns=HISTORY_COLUMNS).astype({"DrawTime": "string", "Winners": "Int64", "TotalPayout": "Int64"})
+    except (ValueError, TypeError):
+        pass
+    logger.info("%s is not in the typed schema; normalizing", path)
+    return clean(load_raw(path))
@@ -0,0 +1,290 @@
+# parsers.py
+"""
+Parsers for the result sources: lotterypost-style HTML and the winning-numbers PDF text.
+
+The iter_* functions are generators that yield draw rows as they are read:
+HTML row by row, PDFs page by page with each pdfplumber page released once
+its text is extracted, so memory stays flat however long the archive is.
+The parse_* functions return the same rows as a list.
+
+HTML goes through lxml's pull parser when installed, otherwise through the
+standard library's incremental parser; both stream. CASH3_HTML_BACKEND picks
+one explicitly, including "selectolax", which is fast on small pages but
+reads the whole page and builds a full DOM, so it is never chosen by default.
+"""
+import codecs
+import io
+import logging
+import os
+from datetime import datetime
+from html.parser import HTMLParser
+
+import metrics
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+except ImportError:  # optional
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+# Wall time of each parse_* call, or of draining an iter_* generator (see drain()).
+PARSE_SECONDS = metrics.histogram("cash3_parse_seconds", "Result page parse time")
+SKIPPED_ROWS = metrics.counter("cash3_parse_skipped_rows", "Result rows dropped because they failed to parse")
+
+# Bytes read per feed() when HTML comes from a file.
+CHUNK_SIZE = 64 * 1024
+
+
+def normalize_draw_label(raw: str) -> str | None:
+    low = raw.lower()
+    if "mid" in low:
+        return "Midday"
+    if "even" in low:
+        return "Evening"
+    if "night" in low:
+        return "Night"
+    return None
+
+
+def _chunks(source):
+    """str/bytes as-is, or a file object read CHUNK_SIZE at a time."""
+    if isinstance(source, (str, bytes, bytearray)):
+        yield source
+        return
+    while chunk := source.read(CHUNK_SIZE):
+        yield chunk
+
+
+class _ResultRows(HTMLParser):
+    """
+    Incremental parser collecting the cell texts of `table.results tbody tr`
+    rows; complete rows are queued in .rows as soon as their </tr> is seen.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []  # one bool per open <table>: has class "results"
+        self.tbody = 0
+        self.row = None
+        self.cell = None
+        self.rows = []
+
+    def _in_results_body(self):
+        return self.tbody > 0 and any(self.tables)
+
+    def _end_cell(self):
+        if self.cell is not None:
+            self.row.append("".join(self.cell))
+            self.cell = None
+
+    def _end_row(self):
+        if self.row is not None:
+            self._end_cell()
+            self.rows.append(self.row)
+            self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables.append("results" in (dict(attrs).get("class") or "").split())
+        elif tag == "tbody" and any(self.tables):
+            self.tbody += 1
+        elif tag == "tr" and self._in_results_body():
+            self._end_row()
+            self.row = []
+        elif tag == "td" and self.row is not None:
+            self._end_cell()
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            if self.row is not None:
+                self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+        elif tag == "tbody" and self.tbody:
+            self._end_row()
+            self.tbody -= 1
+        elif tag == "table" and self.tables:
+            self._end_row()
+            self.tables.pop()
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+
+
+def _stdlib_rows(source):
+    parser = _ResultRows()
+    # Incremental, so a character split across two chunks still decodes.
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in _chunks(source):
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = decoder.decode(chunk)
+        parser.feed(chunk)
+        yield from parser.rows
+        parser.rows.clear()
+    parser.close()
+    yield from parser.rows
+
+
+def _lxml_rows(source):
+    parser = etree.HTMLPullParser(events=("end",), tag="tr")
+    for chunk in _chunks(source):
+        parser.feed(chunk)
+        for _, tr in parser.read_events():
+            ancestors = [(el.tag, (el.get("class") or "").split()) for el in tr.iterancestors()]
+            tbody = next((i for i, (tag, _) in enumerate(ancestors) if tag == "tbody"), None)
+            if tbody is not None and any(tag == "table" and "results" in cls for tag, cls in ancestors[tbody:]):
+                yield ["".join(td.itertext()) for td in tr.iter("td")]
+            # Drop rows already handled so the tree never holds more than one.
+            tr.clear()
+            while tr.getprevious() is not None:
+                del tr.getparent()[0]
+    parser.close()
+
+
+def _selectolax_rows(source):
+    # Not streaming: the whole page is read and parsed before the first row.
+    html = b"".join(c if isinstance(c, bytes) else c.encode() for c in _chunks(source))
+    for tr in LexborHTMLParser(html).css("table.results tbody tr"):
+        yield [td.text() for td in tr.css("td")]
+
+
+HTML_BACKENDS = {
+    "lxml": _lxml_rows,
+    "stdlib": _stdlib_rows,
+    "selectolax": _selectolax_rows,
+}
+
+
+def html_backend() -> str:
+    """CASH3_HTML_BACKEND if set, else the fastest installed streaming backend."""
+    chosen = os.environ.get("CASH3_HTML_BACKEND")
+    if chosen:
+        if chosen not in HTML_BACKENDS:
+            raise ValueError(f"unknown HTML backend {chosen!r}; expected one of {', '.join(HTML_BACKENDS)}")
+        return chosen
+    if etree is not None:
+        return "lxml"
+    return "stdlib"
+
+
+def _html_draw(cells: list[str]) -> dict | None:
+    if len(cells) < 3:
+        return None
+    date_str = cells[0].strip()
+    draw_label = normalize_draw_label(cells[1].strip())
+    number_text = cells[2].strip()
+    if not draw_label:
+        return None
+    # Parse date
+    draw_date = datetime.strptime(date_str, "%m/%d/%Y").date()
+    numbers = [int(n) for n in number_text.split() if n.isdigit()]
+    if len(numbers) != 3:
+        return None
+    return {
+        "Date": draw_date.isoformat(),
+        "Draw": draw_label,
+        "DrawTime": "",  # will be filled by prepare_data
+        "Digit1": numbers[0],
+        "Digit2": numbers[1],
+        "Digit3": numbers[2],
+    }
+
+
+def iter_results_html(source, backend: str | None = None):
+    """
+    Yields draw rows from a lotterypost-style results page (table.results).
+    `source` is the page as str/bytes or a binary file object, which is
+    read in chunks.
+    """
+    for cells in HTML_BACKENDS[backend or html_backend()](source):
+        try:
+            row = _html_draw(cells)
+        except Exception as e_row:
+            SKIPPED_ROWS.inc(format="html")
+            logger.debug("Skipping row %r due to parse error: %s", cells, e_row)
+            continue
+        if row:
+            yield row
+
+
+def drain(parse, source, keep=None) -> list[dict]:
+    """
+    Runs iter_pdf_rows or iter_results_html over source to completion,
+    recorded in cash3_parse_seconds like parse_*; `keep` filters rows as
+    they are parsed.
+    """
+    fmt = "pdf" if parse is iter_pdf_rows else "html"
+    with PARSE_SECONDS.time(format=fmt):
+        return [row for row in parse(source) if keep is None or keep(row)]
+
+
+@metrics.timed("cash3_parse_seconds", "Result page parse time", format="html")
+def parse_results_html(html: str | bytes) -> list[dict]:
+    """Draw rows from a lotterypost-style results page (table.results)."""
+    return list(iter_results_html(html))
+
+
+def iter_pdf_lines(lines):
+    """
+    Draw rows from text lines like "07/25/2025 Night 3 7 7 808 $12,345":
+    date, draw label, then three single digits.
+    """
+    for line in lines:
+        parts = line.strip().split()
+        # crude check: date at start MM/DD/YYYY, then draw label, then three digits
+        if len(parts) < 6:
+            continue
+        digit_candidates = [int(tok) for tok in parts[2:5] if tok.isdigit() and len(tok) == 1]
+        if len(digit_candidates) != 3:
+            continue
+        try:
+            draw_date = datetime.strptime(parts[0], "%m/%d/%Y").date()
+        except ValueError:
+            continue
+        label = parts[1].capitalize()
+        if label not in ["Midday", "Evening", "Night"]:
+            continue
+        yield {
+            "Date": draw_date.isoformat(),
+            "Draw": label,
+            "DrawTime": "",  # to be filled later
+            "Digit1": digit_candidates[0],
+            "Digit2": digit_candidates[1],
+            "Digit3": digit_candidates[2],
+        }
+
+
+def parse_pdf_lines(lines) -> list[dict]:
+    return list(iter_pdf_lines(lines))
+
+
+def iter_pdf_rows(source):
+    """
+    Yields draw rows from a winning-numbers PDF one page at a time. `source`
+    is the PDF as bytes, a path, or a binary file object.
+    """
+    import pdfplumber
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages:
+            try:
+                text = page.extract_text() or ""
+            finally:
+                # Release the page's parsed layout before moving on.
+                page.close()
+            yield from iter_pdf_lines(text.splitlines())
+
+
+@metrics.timed("cash3_parse_seconds", "Result page parse time", format="pdf")
+def parse_pdf_bytes(data: bytes) -> list[dict]:
+    return list(iter_pdf_rows(data))
@@ -1,12 +1,35 @@
+from datetime import datetime, timezone
+
+import backtest
+import ensemble_predictor
+import history_store
+import stats_engine
+
 def compute_simple_insights(df, window=100):
-    recent = df.sort_values(["Date"], ascending=False).head(window)
-    insights = {"common": {}, "uncommon": {}}
-    for pos in ["Digit1", "Digit2", "Digit3"]:
-        counts = recent[pos].value_counts()
-        if not counts.empty:
-            insights["common"][pos] = int(counts.idxmax())
-            insights["uncommon"][pos] = int(counts.idxmin())
-        else:
-            insights["common"][pos] = None
-            insights["uncommon"][pos] = None
-    return insights
+    """Common/uncommon digit per position over the last `window` draws."""
+    cols = history_store.frame_to_columns(df)
+    return stats_engine.RollingWindows.from_columns(cols, (window,)).insights(window)
+
+def compute_horizon_insights(cols=None, windows=stats_engine.DEFAULT_WINDOWS):
+    """Insights for several horizons at once, e.g. {"30": ..., "100": ..., "all": ...}."""
+    cols = history_store.load_columns() if cols is None else cols
+    return stats_engine.RollingWindows.from_columns(cols, windows).horizons()
+
+def predict_next_numbers(df, top=10):
+    """Blended ensemble ranking for the draw after the last one in df."""
+    cols = history_store.frame_to_columns(df)
+    result = ensemble_predictor.run(cols, top=top)
+    slot = (int(cols.draw[-1]) + 1) % len(history_store.DRAW_SLOTS) if len(cols) else 0
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "after": history_store.columns_to_frame(cols.take(slice(-1, None))).iloc[0].to_dict() if len(cols) else None,
+        "draw": history_store.DRAW_SLOTS[slot],
+        "top_triplets": [code for code, _ in result["ranking"]],
+        "scores": {code: round(score, 6) for code, score in result["ranking"]},
+    }
+
+def evaluate_accuracy(df, last_n=30):
+    """Walk-forward hit rates of each strategy over the last `last_n` draws of df."""
+    cols = history_store.frame_to_columns(df)
+    results = backtest.run(start=len(cols) - last_n, cols=cols, processes=False)
+    return backtest.summarize(results)
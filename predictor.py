@@ -1,26 +1,56 @@
 # predictor.py
 
-import pandas as pd
-from collections import Counter
+from datetime import date
 
-CSV_PATH = "data/ga_cash3_history.csv"
+import numpy as np
+
+import history_store
 
 def load():
-    df = pd.read_csv(CSV_PATH)
-    return df
-
-def top_triplets(n=5):
-    df = load()
-    df["Triplet"] = df.apply(lambda r: f"{int(r.Digit1)}{int(r.Digit2)}{int(r.Digit3)}", axis=1)
-    counts = Counter(df["Triplet"])
-    return counts.most_common(n)
-
-def hot_digits():
-    df = load()
-    overall = Counter()
-    for _, r in df.iterrows():
-        overall.update([r.Digit1, r.Digit2, r.Digit3])
-    return overall.most_common()
+    return history_store.load_frame()
+
+def _ordinal(value):
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal()
+
+def select(cols, draw=None, start=None, end=None):
+    """
+    Digit arrays (d1, d2, d3) restricted to one draw slot and/or an inclusive
+    date window. Columns are date-sorted, so the window is a searchsorted slice.
+    """
+    lo = np.searchsorted(cols.date, _ordinal(start), side="left") if start is not None else 0
+    hi = np.searchsorted(cols.date, _ordinal(end), side="right") if end is not None else len(cols)
+    d1, d2, d3 = cols.d1[lo:hi], cols.d2[lo:hi], cols.d3[lo:hi]
+    if draw is not None:
+        mask = cols.draw[lo:hi] == history_store.SLOT_INDEX[draw]
+        d1, d2, d3 = d1[mask], d2[mask], d3[mask]
+    return d1, d2, d3
+
+def _rank(values, bins):
+    """
+    (bin, count) pairs by descending count; ties keep first-seen order, which
+    is what Counter.most_common() returns for the same sequence.
+    """
+    counts = np.bincount(values, minlength=bins)
+    first_seen = np.full(bins, len(values), dtype=np.int64)
+    np.minimum.at(first_seen, values, np.arange(len(values)))
+    order = np.lexsort((first_seen, -counts))
+    order = order[counts[order] > 0]
+    return order, counts[order]
+
+def top_triplets(n=5, draw=None, start=None, end=None, cols=None):
+    cols = history_store.load_columns() if cols is None else cols
+    d1, d2, d3 = select(cols, draw, start, end)
+    codes = d1.astype(np.intp) * 100 + d2.astype(np.intp) * 10 + d3
+    order, counts = _rank(codes, 1000)
+    return [(f"{code:03d}", int(count)) for code, count in zip(order[:n], counts[:n])]
+
+def hot_digits(draw=None, start=None, end=None, cols=None):
+    cols = history_store.load_columns() if cols is None else cols
+    digits = np.stack(select(cols, draw, start, end), axis=1).ravel().astype(np.intp)
+    order, counts = _rank(digits, 10)
+    return [(int(d), int(count)) for d, count in zip(order, counts)]
 
 if __name__ == "__main__":
     print("Top triplets:", top_triplets())
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import logging
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from itertools import repeat
 from pathlib import Path
 import re
 
 import pandas as pd
-import pdfplumber
+
+import fingerprints
+import metrics
+import history_store
+import stats_engine
+from strategies import drawtime_model
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
@@ -15,6 +24,17 @@ logger = logging.getLogger(__name__)
 HISTORY_PATH = Path("data/ga_cash3_history.csv")
 SUMMARY_PATH = Path("data/summary.json")
 
+DATE_PATTERN = re.compile(r"(\d{1,2}/\d{1,2}/\d{4})")
+NON_DIGIT = re.compile(r"\D")
+DRAW_LABELS = frozenset(("midday", "evening", "night"))
+# Below this many pages the process pool costs more than it saves.
+MIN_PAGES_FOR_POOL = 4
+
+PAGE_CACHE_PATH = Path("data/pdf_page_cache.json")
+MAX_CACHED_PAGES = 5000
+# Bump when parse_page() output changes so cached pages are re-parsed.
+PAGE_PARSER_VERSION = "1"
+
 
 def extract_digits_from_row(row):
     """
@@ -28,7 +48,7 @@ def extract_digits_from_row(row):
     for i in range(len(row) - 2):
         slice_ = row[i : i + 3]
         try:
-            digits = [int(re.sub(r"\D", "", str(c))) for c in slice_]
+            digits = [int(NON_DIGIT.sub("", str(c))) for c in slice_]
             if all(0 <= d <= 9 for d in digits):
                 return digits
         except Exception:
@@ -50,118 +70,237 @@ def extract_digits_from_row(row):
     return None
 
 
-def parse_pdf_to_dataframe(pdf_path: Path) -> pd.DataFrame:
+def parse_table_row(raw):
+    """
+    Turns one extracted table row into a draw dict, or None if the row is a
+    header, lacks a draw label/date, or has no recognizable digits.
+    """
+    if not raw or len(raw) < 2:
+        return None
+
+    # Skip header-like rows
+    joined = " ".join([str(c).lower() if c else "" for c in raw])
+    if "date" in joined and "draw" in joined:
+        return None
+
+    # Attempt to find draw type ("Midday", "Evening", "Night")
+    draw_cell = None
+    for cell in raw:
+        if isinstance(cell, str) and cell.strip().lower() in DRAW_LABELS:
+            draw_cell = cell.strip().title()
+            break
+    if not draw_cell:
+        return None  # cannot determine draw type
+
+    # Date: look for anything matching MM/DD/YYYY or similar in the row
+    date_cell = None
+    for cell in raw:
+        if not cell:
+            continue
+        m = DATE_PATTERN.search(cell)
+        if m:
+            try:
+                date_cell = datetime.strptime(m.group(1), "%m/%d/%Y").date().isoformat()
+            except ValueError:
+                date_cell = m.group(1)
+            break
+    if not date_cell:
+        return None  # no date, skip
+
+    # Extract digits
+    digits = extract_digits_from_row(raw)
+    if not digits:
+        logger.debug("Skipping row; couldn't extract digits: %s", raw)
+        return None
+    d1, d2, d3 = digits
+    return {
+        "Date": date_cell,
+        "Draw": draw_cell,
+        "Digit1": d1,
+        "Digit2": d2,
+        "Digit3": d3,
+    }
+
+
+def parse_page(page) -> list[dict]:
+    rows = []
+    for table in page.extract_tables():
+        for raw in table:
+            row = parse_table_row(raw)
+            if row:
+                rows.append(row)
+    return rows
+
+
+def page_content_hash(page) -> str:
+    """sha256 of a page's raw (decoded) content streams, salted with the parser version."""
+    from pdfminer.pdftypes import resolve1
+
+    h = hashlib.sha256(PAGE_PARSER_VERSION.encode())
+    for stream in page.page_obj.contents:
+        h.update(resolve1(stream).get_data())
+    return h.hexdigest()
+
+
+def load_page_cache(path: Path = PAGE_CACHE_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_page_cache(cache: dict, path: Path = PAGE_CACHE_PATH):
+    # Dict order is least- to most-recently used; keep the newest entries.
+    if len(cache) > MAX_CACHED_PAGES:
+        cache = dict(list(cache.items())[-MAX_CACHED_PAGES:])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def _parse_pages(pdf_path: Path, indices: list[int]) -> list[list[dict]]:
+    """Worker entry point: opens the PDF independently and parses the given pages."""
+    import pdfplumber
+
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for i in indices:
+            page = pdf.pages[i]
+            try:
+                results.append(parse_page(page))
+            finally:
+                page.close()
+    return results
+
+
+PDF_PAGES = metrics.counter("cash3_pdf_pages", "PDF pages handled, by result (cached or parsed)")
+
+
+def _page_hashes(pdf_path: Path) -> list[str]:
+    import pdfplumber
+
+    hashes = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            try:
+                hashes.append(page_content_hash(page))
+            finally:
+                page.close()
+    return hashes
+
+
+def _pool_pages(pdf_path: Path, hashes: list[str], todo: list[int], workers: int, cache: dict):
+    # A few chunks per worker keeps the pool busy when page costs vary.
+    n_chunks = min(len(todo), workers * 4)
+    chunks = [todo[len(todo) * i // n_chunks:len(todo) * (i + 1) // n_chunks] for i in range(n_chunks)]
+    logger.info("Parsing %s pages with %s workers", len(todo), workers)
+    parsed = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for indices, results in zip(chunks, pool.map(_parse_pages, repeat(pdf_path), chunks)):
+            parsed.update(zip(indices, results))
+    for i, h in enumerate(hashes):
+        page_rows = parsed.pop(i) if i in parsed else cache.pop(h)
+        cache[h] = page_rows
+        yield page_rows
+
+
+def iter_pdf_pages(pdf_path: Path, workers: int = 1, cache: dict | None = None):
+    """
+    Yields each page's parsed rows in page order. Pages whose content hash
+    is in `cache` are not re-extracted; `cache` is updated with every page.
+    Serially, each page is hashed and parsed in one pass over the document
+    and closed as soon as it is handled, even on error, so memory does not
+    grow with the number of pages.
+    """
+    # Imported here so summary-only runs never load the PDF stack.
+    import pdfplumber
+
+    cache = {} if cache is None else cache
+    if workers > 1:
+        # The pool needs the list of changed pages up front.
+        hashes = _page_hashes(pdf_path)
+        todo = [i for i, h in enumerate(hashes) if h not in cache]
+        if len(todo) >= MIN_PAGES_FOR_POOL:
+            logger.info("PDF pages: %s cached, %s to parse", len(hashes) - len(todo), len(todo))
+            PDF_PAGES.inc(len(hashes) - len(todo), result="cached")
+            PDF_PAGES.inc(len(todo), result="parsed")
+            yield from _pool_pages(pdf_path, hashes, todo, workers, cache)
+            return
+
+    counts = {"cached": 0, "parsed": 0}
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            try:
+                h = page_content_hash(page)
+                result = "cached" if h in cache else "parsed"
+                page_rows = cache.pop(h) if result == "cached" else parse_page(page)
+            finally:
+                page.close()
+            counts[result] += 1
+            cache[h] = page_rows
+            yield page_rows
+    logger.info("PDF pages: %s cached, %s parsed", counts["cached"], counts["parsed"])
+    for result, n in counts.items():
+        PDF_PAGES.inc(n, result=result)
+
+
+@metrics.timed("cash3_pdf_parse_seconds", "Local PDF parse time including the page cache")
+def parse_pdf_to_dataframe(pdf_path: Path, workers: int = 1, use_cache: bool = True) -> pd.DataFrame:
     """
     Parses the provided PDF and returns a DataFrame with columns:
     Date, Draw, Digit1, Digit2, Digit3
+
+    Parsed rows are cached per page under the hash of the page's content
+    stream, so only pages that changed since a previous PDF are re-extracted.
+    With workers > 1 those pages are parsed in a process pool and merged
+    back in page order; fewer than MIN_PAGES_FOR_POOL pages stay serial.
+    Pages are streamed through iter_pdf_pages() straight into the columns.
     """
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found at {pdf_path}")
 
     logger.info(f"Parsing PDF at {pdf_path}")
-    rows = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables()
-            for table in tables:
-                for raw in table:
-                    if not raw or len(raw) < 2:
-                        continue
-
-                    # Skip header-like rows
-                    joined = " ".join([str(c).lower() if c else "" for c in raw])
-                    if "date" in joined and "draw" in joined:
-                        continue
-
-                    # Attempt to find draw type ("Midday", "Evening", "Night")
-                    draw_cell = None
-                    for cell in raw:
-                        if not cell:
-                            continue
-                        if isinstance(cell, str) and cell.strip().lower() in ("midday", "evening", "night"):
-                            draw_cell = cell.strip().title()
-                            break
-                    if not draw_cell:
-                        # maybe it's second column if consistent
-                        candidate = raw[1] if len(raw) > 1 else ""
-                        if isinstance(candidate, str) and candidate.strip().lower() in ("midday", "evening", "night"):
-                            draw_cell = candidate.strip().title()
-                    if not draw_cell:
-                        continue  # cannot determine draw type
-
-                    # Date: look for anything matching MM/DD/YYYY or similar in the row
-                    date_cell = None
-                    date_pattern = re.compile(r"(\d{1,2}/\d{1,2}/\d{4})")
-                    for cell in raw:
-                        if not cell:
-                            continue
-                        m = date_pattern.search(cell)
-                        if m:
-                            try:
-                                parsed = datetime.strptime(m.group(1), "%m/%d/%Y").date().isoformat()
-                                date_cell = parsed
-                                break
-                            except Exception:
-                                date_cell = m.group(1)
-                                break
-                    if not date_cell:
-                        continue  # no date, skip
-
-                    # Extract digits
-                    digits = extract_digits_from_row(raw)
-                    if not digits:
-                        logger.debug("Skipping row; couldn't extract digits: %s", raw)
-                        continue
-                    d1, d2, d3 = digits
-
-                    rows.append({
-                        "Date": date_cell,
-                        "Draw": draw_cell,
-                        "Digit1": d1,
-                        "Digit2": d2,
-                        "Digit3": d3,
-                    })
-
-    if not rows:
+    cache = load_page_cache() if use_cache else {}
+    columns = {}
+    for page_rows in iter_pdf_pages(pdf_path, workers, cache):
+        for row in page_rows:
+            for key, value in row.items():
+                columns.setdefault(key, []).append(value)
+    if use_cache:
+        save_page_cache(cache)
+
+    if not columns:
         logger.warning("No valid rows parsed from PDF; returning empty DataFrame.")
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame(columns)
     return df
 
 
-def compute_simple_insights(df: pd.DataFrame):
-    def pick_common_uncommon(series):
-        if series.empty:
-            return {"common": None, "uncommon": None}
-        counts = series.value_counts()
-        common = int(counts.idxmax())
-        uncommon = int(counts.idxmin())
-        return {"common": common, "uncommon": uncommon}
-
-    common = {
-        "Digit1": pick_common_uncommon(df["Digit1"])["common"] if "Digit1" in df else None,
-        "Digit2": pick_common_uncommon(df["Digit2"])["common"] if "Digit2" in df else None,
-        "Digit3": pick_common_uncommon(df["Digit3"])["common"] if "Digit3" in df else None,
-    }
-    uncommon = {
-        "Digit1": pick_common_uncommon(df["Digit1"])["uncommon"] if "Digit1" in df else None,
-        "Digit2": pick_common_uncommon(df["Digit2"])["uncommon"] if "Digit2" in df else None,
-        "Digit3": pick_common_uncommon(df["Digit3"])["uncommon"] if "Digit3" in df else None,
-    }
-    return {"common": common, "uncommon": uncommon}
+def compute_simple_insights(state: stats_engine.StatsState):
+    return stats_engine.insights_from_counts(state.pos_counts)
 
 
-def build_summary(df: pd.DataFrame):
-    insights = compute_simple_insights(df)
+@metrics.timed("cash3_summary_build_seconds", "Statistics and summary.json rebuild time")
+def build_summary(cols: history_store.HistoryColumns | None = None, state: stats_engine.StatsState | None = None):
+    cols = history_store.load_columns(csv_path=HISTORY_PATH) if cols is None else cols
+    state = stats_engine.sync(cols) if state is None else state
+    insights = compute_simple_insights(state)
     summary = {
         "last_updated": datetime.now(timezone.utc).isoformat(),
-        "total_draws": int(len(df)),
+        "total_draws": int(len(cols)),
         "latest_draw": {},
         "predictions": insights,
         "simple_insights": insights,
+        "horizons": state.rolling.horizons(),
+        # Resident processes (ingest_daemon) keep the slot partitions warm and extend them here.
+        # Per slot: the web app picks the next draw when it serves the summary (data_store.next_draw).
+        "next_draws": drawtime_model.predict_slots(cols=cols) if len(cols) else {},
     }
 
-    if not df.empty:
-        latest = df.iloc[-1].to_dict()
+    if len(cols):
+        latest = history_store.columns_to_frame(cols.take(slice(-1, None))).iloc[0].to_dict()
         for k, v in list(latest.items()):
             if hasattr(v, "item"):
                 latest[k] = v.item()
@@ -172,26 +311,22 @@ def build_summary(df: pd.DataFrame):
         json.dump(summary, f, indent=2)
     logger.info("✅ Summary written to %s", SUMMARY_PATH)
 
+    # Re-render the static dashboard so the web app keeps serving files.
+    import dashboard
+
+    try:
+        dashboard.publish()
+    except Exception as e:
+        logger.warning("Dashboard not published; the app will render it live: %s", e)
 
-def merge_and_write_history(new_df: pd.DataFrame):
-    HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
-    if HISTORY_PATH.exists():
-        try:
-            existing = pd.read_csv(HISTORY_PATH)
-        except Exception:
-            logger.warning("Existing history unreadable; starting fresh.")
-            existing = pd.DataFrame()
-        combined = pd.concat([existing, new_df], ignore_index=True)
-        combined = combined.drop_duplicates(subset=["Date", "Draw", "Digit1", "Digit2", "Digit3"])
-    else:
-        combined = new_df
 
-    for col in ["Digit1", "Digit2", "Digit3"]:
-        if col in combined:
-            combined[col] = combined[col].fillna(0).astype(int)
-    combined.to_csv(HISTORY_PATH, index=False)
-    logger.info("✅ Wrote merged history with %s total draws to %s", len(combined), HISTORY_PATH)
-    return combined
+def merge_and_write_history(new_df: pd.DataFrame, apply_corrections: bool = False):
+    appended, conflicts = history_store.append_draws(new_df, csv_path=HISTORY_PATH)
+    if len(conflicts) and apply_corrections:
+        history_store.apply_corrections(conflicts, csv_path=HISTORY_PATH)
+    cols = history_store.refresh_columns(csv_path=HISTORY_PATH)
+    logger.info("✅ Appended %s new draws; history has %s total draws in %s", appended, len(cols), HISTORY_PATH)
+    return cols
 
 
 def main():
@@ -200,20 +335,51 @@ def main():
         "--input", "-i", type=str, default="data/latest.pdf",
         help="Path to local PDF (no network fetching)."
     )
+    parser.add_argument(
+        "--workers", "-w", type=int, default=1,
+        help="Processes for PDF page parsing (0 = one per CPU; small PDFs are parsed serially)."
+    )
+    parser.add_argument(
+        "--no-page-cache", action="store_true",
+        help="Ignore and do not update the per-page parse cache."
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Re-parse and rebuild even if the input is unchanged since the last run."
+    )
+    parser.add_argument(
+        "--apply-corrections", action="store_true",
+        help="Overwrite existing draws whose digits differ from the parsed input."
+    )
     args = parser.parse_args()
     pdf_path = Path(args.input)
+    workers = args.workers or os.cpu_count() or 1
 
     logger.info("Running prepare_data at %s UTC", datetime.now(timezone.utc).isoformat())
     logger.info("Using provided local file %s (no network fetch).", pdf_path)
 
+    fingerprint_key = f"parsed:{pdf_path}"
+    digest = fingerprints.sha256_file(pdf_path)
+    outputs_exist = HISTORY_PATH.exists() and SUMMARY_PATH.exists()
+    if not args.force and outputs_exist and fingerprints.matches(fingerprint_key, digest):
+        logger.info("Input %s unchanged since last run (sha256 %s…); nothing to do.", pdf_path, digest[:12])
+        return
+
+    parsed_ok = False
     try:
-        new_draws_df = parse_pdf_to_dataframe(pdf_path)
+        new_draws_df = parse_pdf_to_dataframe(pdf_path, workers=workers, use_cache=not args.no_page_cache)
+        parsed_ok = True
     except Exception as e:
         logger.error("Failed to parse PDF: %s", e)
         new_draws_df = pd.DataFrame()
 
-    merged = merge_and_write_history(new_draws_df)
+    merged = merge_and_write_history(new_draws_df, apply_corrections=args.apply_corrections)
     build_summary(merged)
+    # A parse that found no rows (e.g. the PDF layout changed) must be retried next run, not skipped.
+    if parsed_ok and len(new_draws_df):
+        fingerprints.record(fingerprint_key, sha256=digest, rows=int(len(new_draws_df)))
+    elif parsed_ok:
+        logger.warning("No rows parsed from %s; not recording its fingerprint.", pdf_path)
 
 
 if __name__ == "__main__":
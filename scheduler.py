@@ -1,20 +1,7 @@
-import schedule
-import time
-import shutil
-from datetime import datetime
+# scheduler.py
+# Superseded by ingest_daemon.py, which reads the draw times from config and
+# runs the full ingest pipeline; kept so existing start commands still work.
+from ingest_daemon import main
 
-def update_csv():
-    try:
-        print("Checking for new updates...")
-        shutil.copy('data/ga_cash3_latest.csv', 'data/ga_cash3_history.csv')
-        print("CSV updated at", datetime.now())
-    except Exception as e:
-        print("CSV update failed:", e)
-
-schedule.every().day.at("13:29").do(update_csv)
-schedule.every().day.at("19:59").do(update_csv)
-schedule.every().day.at("00:34").do(update_csv)
-
-while True:
-    schedule.run_pending()
-    time.sleep(60)
+if __name__ == "__main__":
+    main()
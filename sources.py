@@ -0,0 +1,24 @@
+# sources.py
+"""The remote result sources raced by async_fetch."""
+import os
+
+import async_fetch
+import fetch_pdf
+import parsers
+
+HTML_URL = "https://www.lotterypost.com/results/georgia/cash-3"
+PDF_URL = fetch_pdf.PDF_URL
+# Extra result pages/PDFs raced alongside the primary sources, comma-separated.
+MIRROR_URLS = [u.strip() for u in os.environ.get("CASH3_MIRROR_URLS", "").split(",") if u.strip()]
+
+
+def default_sources() -> list[async_fetch.Source]:
+    """HTML first (cheap to parse), then the official PDF, then any mirrors."""
+    configured = [
+        async_fetch.Source("lotterypost-html", HTML_URL, parsers.parse_results_html),
+        async_fetch.Source("galottery-pdf", PDF_URL, parsers.parse_pdf_bytes, timeout=30, cpu_bound=True),
+    ]
+    for i, url in enumerate(MIRROR_URLS, start=1):
+        parse = parsers.parse_pdf_bytes if url.lower().endswith(".pdf") else parsers.parse_results_html
+        configured.append(async_fetch.Source(f"mirror-{i}", url, parse, cpu_bound=parse is parsers.parse_pdf_bytes))
+    return configured
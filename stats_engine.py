@@ -0,0 +1,250 @@
+# stats_engine.py
+"""
+Persisted running statistics over the draw history.
+
+StatsState holds per-position digit counts, triplet counts, per-slot digit
+counts, the last draw index at which each digit/triplet was seen and the
+rolling-window digit counts for the dashboard horizons. Each
+appended draw is applied with a handful of O(1) array updates; sync() applies
+only the draws the state has not seen yet and falls back to a full rebuild
+when the history was rewritten rather than appended to.
+
+    python stats_engine.py --rebuild
+"""
+import argparse
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+import history_store
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = Path("data/stats_state.npz")
+
+N_SLOTS = len(history_store.DRAW_SLOTS)
+# Horizons, in draws, reported on the dashboard; None is the whole history.
+DEFAULT_WINDOWS = (30, 100, 365, None)
+
+
+def common_uncommon(counts):
+    """Most and least frequent digit among those seen, or (None, None)."""
+    seen = np.flatnonzero(counts)
+    if not len(seen):
+        return None, None
+    return int(np.argmax(counts)), int(seen[np.argmin(counts[seen])])
+
+
+def insights_from_counts(pos_counts):
+    common, uncommon = {}, {}
+    for pos, col in enumerate(history_store.DIGIT_COLUMNS):
+        common[col], uncommon[col] = common_uncommon(pos_counts[pos])
+    return {"common": common, "uncommon": uncommon}
+
+
+class StatsState:
+    def __init__(self):
+        self.n = 0
+        # (date ordinal, slot) of the last applied draw; (-1, -1) when empty
+        self.last_key = (-1, -1)
+        # Content hash of the applied rows (see history_store.is_prefix); None after update().
+        self.version = None
+        self.pos_counts = np.zeros((3, 10), dtype=np.int64)
+        self.triplet_counts = np.zeros(1000, dtype=np.int64)
+        self.slot_draws = np.zeros(N_SLOTS, dtype=np.int64)
+        self.slot_pos_counts = np.zeros((N_SLOTS, 3, 10), dtype=np.int64)
+        self.digit_last_seen = np.full((3, 10), -1, dtype=np.int64)
+        self.triplet_last_seen = np.full(1000, -1, dtype=np.int64)
+        self.rolling = RollingWindows()
+
+    _ARRAYS = (
+        "pos_counts", "triplet_counts", "slot_draws", "slot_pos_counts",
+        "digit_last_seen", "triplet_last_seen",
+    )
+
+    def update(self, date_ordinal, slot, d1, d2, d3):
+        """Applies one draw appended after everything already counted."""
+        i = self.n
+        code = d1 * 100 + d2 * 10 + d3
+        for pos, d in enumerate((d1, d2, d3)):
+            self.pos_counts[pos, d] += 1
+            self.slot_pos_counts[slot, pos, d] += 1
+            self.digit_last_seen[pos, d] = i
+        self.triplet_counts[code] += 1
+        self.triplet_last_seen[code] = i
+        self.slot_draws[slot] += 1
+        self.rolling.push(d1, d2, d3)
+        self.n = i + 1
+        self.last_key = (int(date_ordinal), int(slot))
+        self.version = None
+
+    @classmethod
+    def from_columns(cls, cols):
+        """Full recomputation from history columns in a single vectorized pass."""
+        state = cls()
+        n = len(cols)
+        if n == 0:
+            return state
+        idx = np.arange(n)
+        digits = np.stack([cols.d1, cols.d2, cols.d3]).astype(np.intp)
+        slots = np.asarray(cols.draw, dtype=np.intp)
+        codes = digits[0] * 100 + digits[1] * 10 + digits[2]
+        for pos in range(3):
+            state.pos_counts[pos] = np.bincount(digits[pos], minlength=10)
+            np.maximum.at(state.digit_last_seen[pos], digits[pos], idx)
+            flat = slots * 10 + digits[pos]
+            state.slot_pos_counts[:, pos, :] = np.bincount(flat, minlength=N_SLOTS * 10).reshape(N_SLOTS, 10)
+        state.triplet_counts[:] = np.bincount(codes, minlength=1000)
+        np.maximum.at(state.triplet_last_seen, codes, idx)
+        state.slot_draws[:] = np.bincount(slots, minlength=N_SLOTS)
+        state.rolling = RollingWindows.from_columns(cols, totals=state.pos_counts)
+        state.n = n
+        state.last_key = (int(cols.date[-1]), int(cols.draw[-1]))
+        state.version = history_store.history_version(cols)
+        return state
+
+    def save(self, path: Path = STATE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f, n=self.n, last_key=np.array(self.last_key), version=np.array(self.version or ""),
+                rolling_windows=np.array([-1 if w is None else w for w in self.rolling.windows]),
+                rolling_ring=self.rolling.ring,
+                rolling_counts=np.stack([self.rolling.counts[w] for w in self.rolling.windows]),
+                **{name: getattr(self, name) for name in self._ARRAYS},
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = STATE_PATH):
+        state = cls()
+        try:
+            with np.load(path) as data:
+                state.n = int(data["n"])
+                state.last_key = tuple(int(v) for v in data["last_key"])
+                state.version = str(data["version"]) or None
+                for name in cls._ARRAYS:
+                    setattr(state, name, data[name].copy())
+                windows = tuple(None if w < 0 else int(w) for w in data["rolling_windows"])
+                if windows != state.rolling.windows:
+                    raise ValueError(f"rolling windows {windows} differ from {state.rolling.windows}")
+                state.rolling.ring[:] = data["rolling_ring"]
+                for w, counts in zip(windows, data["rolling_counts"]):
+                    state.rolling.counts[w][:] = counts
+                state.rolling.n = state.n
+        except (OSError, KeyError, ValueError) as e:
+            logger.info("No usable stats state at %s (%s); starting empty", path, e)
+            return cls()
+        return state
+
+
+class RollingWindows:
+    """
+    Per-position digit counts over the last N draws for several N at once.
+    A ring buffer of the most recent draws supplies the draw leaving each
+    window, so push() is O(len(windows)) regardless of history length.
+    A window of None means "all draws".
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(windows)
+        finite = [w for w in self.windows if w is not None]
+        self.capacity = max(finite) if finite else 1
+        self.ring = np.zeros((self.capacity, 3), dtype=np.uint8)
+        self.n = 0
+        self.counts = {w: np.zeros((3, 10), dtype=np.int64) for w in self.windows}
+
+    def push(self, d1, d2, d3):
+        digits = (d1, d2, d3)
+        for w, counts in self.counts.items():
+            if w is not None and self.n >= w:
+                old = self.ring[(self.n - w) % self.capacity]
+                for pos in range(3):
+                    counts[pos, old[pos]] -= 1
+            for pos in range(3):
+                counts[pos, digits[pos]] += 1
+        self.ring[self.n % self.capacity] = digits
+        self.n += 1
+
+    @classmethod
+    def from_columns(cls, cols, windows=DEFAULT_WINDOWS, totals=None):
+        """
+        Initial counts from the tail of the history; only max(window) rows
+        are touched, plus the whole history for a None window unless its
+        (3, 10) counts are passed as `totals`.
+        """
+        rolling = cls(windows)
+        n = len(cols)
+        full = None in rolling.windows and totals is None
+        first = 0 if full else max(n - rolling.capacity, 0)
+        digits = np.stack([cols.d1[first:], cols.d2[first:], cols.d3[first:]], axis=1)
+        for w in rolling.windows:
+            if w is None and not full:
+                rolling.counts[w][:] = totals
+                continue
+            tail = digits if w is None else digits[max(n - w - first, 0):]
+            for pos in range(3):
+                rolling.counts[w][pos] = np.bincount(tail[:, pos], minlength=10)
+        tail = digits[max(n - rolling.capacity - first, 0):]
+        slots = np.arange(n - len(tail), n) % rolling.capacity
+        rolling.ring[slots] = tail
+        rolling.n = n
+        return rolling
+
+    def insights(self, window):
+        return insights_from_counts(self.counts[window])
+
+    def horizons(self):
+        """Insights for every window, keyed "30", "100", ... and "all"."""
+        return {("all" if w is None else str(w)): self.insights(w) for w in self.windows}
+
+
+def _is_prefix(state: StatsState, cols) -> bool:
+    """True if the state was built from the first state.n rows of cols, digits included."""
+    return history_store.is_prefix(state.n, state.version, cols)
+
+
+def sync(cols=None, path: Path = STATE_PATH) -> StatsState:
+    """
+    Brings the persisted state up to date with the history columns, applying
+    only newly appended draws, and saves it.
+    """
+    cols = history_store.load_columns() if cols is None else cols
+    state = StatsState.load(path)
+    if state.n == 0:
+        state = StatsState.from_columns(cols)
+    elif not _is_prefix(state, cols):
+        logger.info("History changed before draw %s; rebuilding statistics", state.n)
+        state = StatsState.from_columns(cols)
+    else:
+        added = len(cols) - state.n
+        for i in range(state.n, len(cols)):
+            state.update(int(cols.date[i]), int(cols.draw[i]), int(cols.d1[i]), int(cols.d2[i]), int(cols.d3[i]))
+        state.version = history_store.history_version(cols)
+        if added:
+            logger.info("Applied %s new draws to statistics", added)
+    state.save(path)
+    return state
+
+
+def rebuild(cols=None, path: Path = STATE_PATH) -> StatsState:
+    cols = history_store.load_columns() if cols is None else cols
+    state = StatsState.from_columns(cols)
+    state.save(path)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update or rebuild persisted Cash3 statistics.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute from scratch instead of syncing.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    state = rebuild() if args.rebuild else sync()
+    logger.info("Statistics cover %s draws", state.n)
+
+
+if __name__ == "__main__":
+    main()
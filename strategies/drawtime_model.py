@@ -1 +1,173 @@
+# strategies/drawtime_model.py
+"""
+Per-draw-time model: Midday, Evening and Night draws are treated as three
+separate histories.
 
+The history is partitioned by slot once into contiguous digit arrays with
+running per-slot digit and triplet counts. Appended draws are routed to
+their slot's partition, so per-slot queries never filter the full history.
+Predictions are for the next scheduled draw from draw_calendar and carry
+its published draw time from config.DRAW_TIMES.
+
+    python -m strategies.drawtime_model
+"""
+from datetime import datetime
+
+import numpy as np
+
+import draw_calendar
+import history_store
+from config import DRAW_TIMES
+from strategies import frequency_matrix, history_index
+
+N_SLOTS = len(history_store.DRAW_SLOTS)
+
+
+class SlotPartitions:
+    def __init__(self):
+        self.n = 0
+        # Content hash of the partitioned rows; see history_store.is_prefix. None after update().
+        self.version = None
+        # Per slot: (3, m) digits in draw order and the matching date ordinals,
+        # in buffers with spare capacity; use the digits/dates views.
+        self.sizes = [0] * N_SLOTS
+        self._digits = [np.empty((3, 0), dtype=np.uint8) for _ in range(N_SLOTS)]
+        self._dates = [np.empty(0, dtype=np.int32) for _ in range(N_SLOTS)]
+        self.pos_counts = np.zeros((N_SLOTS, 3, 10), dtype=np.int64)
+        self.triplet_counts = np.zeros((N_SLOTS, 1000), dtype=np.int64)
+
+    @property
+    def digits(self) -> list[np.ndarray]:
+        return [buf[:, :size] for buf, size in zip(self._digits, self.sizes)]
+
+    @property
+    def dates(self) -> list[np.ndarray]:
+        return [buf[:size] for buf, size in zip(self._dates, self.sizes)]
+
+    def _append(self, slot: int, digits: np.ndarray, dates: np.ndarray):
+        """Appends (3, m) digits and their m date ordinals to one slot's partition."""
+        size, m = self.sizes[slot], len(dates)
+        self._digits[slot] = history_index.reserve(self._digits[slot], size, m)
+        self._dates[slot] = history_index.reserve(self._dates[slot], size, m)
+        self._digits[slot][:, size:size + m] = digits
+        self._dates[slot][size:size + m] = dates
+        self.sizes[slot] = size + m
+
+    def extend(self, cols):
+        """Routes the rows of cols after the first self.n to their slot partitions."""
+        if len(cols) <= self.n:
+            return
+        new = cols.take(slice(self.n, None))
+        slots = np.asarray(new.draw)
+        digits = np.stack([new.d1, new.d2, new.d3])
+        dates = np.asarray(new.date)
+        for slot in range(N_SLOTS):
+            mask = slots == slot
+            if not mask.any():
+                continue
+            part = digits[:, mask]
+            self._append(slot, part, dates[mask])
+            wide = part.astype(np.intp)
+            self.pos_counts[slot] += np.bincount(
+                (wide + np.arange(3)[:, None] * 10).ravel(), minlength=30).reshape(3, 10)
+            self.triplet_counts[slot] += np.bincount(wide[0] * 100 + wide[1] * 10 + wide[2], minlength=1000)
+        self.n = len(cols)
+        self.version = history_store.history_version(cols)
+
+    def update(self, date_ordinal, slot, d1, d2, d3):
+        """Applies one draw appended after everything already partitioned."""
+        size = self.sizes[slot]
+        if size == len(self._dates[slot]):
+            self._digits[slot] = history_index.reserve(self._digits[slot], size, 1)
+            self._dates[slot] = history_index.reserve(self._dates[slot], size, 1)
+        self._digits[slot][:, size] = (d1, d2, d3)
+        self._dates[slot][size] = date_ordinal
+        self.sizes[slot] = size + 1
+        self.pos_counts[slot, (0, 1, 2), (d1, d2, d3)] += 1
+        self.triplet_counts[slot, d1 * 100 + d2 * 10 + d3] += 1
+        self.n += 1
+        # Only one row is known here, not the history it extends.
+        self.version = None
+
+    @classmethod
+    def from_columns(cls, cols):
+        parts = cls()
+        parts.extend(cols)
+        return parts
+
+    def is_prefix_of(self, cols) -> bool:
+        return history_store.is_prefix(self.n, self.version, cols)
+
+    def distribution(self, slot: int, window=None):
+        """(3, 10) digit counts and 1000 triplet counts for one slot, over its last `window` draws."""
+        if window is None:
+            return self.pos_counts[slot], self.triplet_counts[slot]
+        size = self.sizes[slot]
+        tail = self._digits[slot][:, max(size - window, 0):size].astype(np.intp)
+        pos = np.bincount((tail + np.arange(3)[:, None] * 10).ravel(), minlength=30).reshape(3, 10)
+        return pos, np.bincount(tail[0] * 100 + tail[1] * 10 + tail[2], minlength=1000)
+
+    def score(self, slot: int, window=None, alpha=1.0, triplet_weight=0.5) -> np.ndarray:
+        """
+        Probability of each triplet 000-999 in `slot`: smoothed per-position
+        digit frequencies multiplied out, blended with smoothed triplet counts.
+        """
+        pos, triplets = self.distribution(slot, window)
+        positional = frequency_matrix.positional(pos, alpha)
+        return (1 - triplet_weight) * positional + triplet_weight * frequency_matrix.smoothed(triplets, alpha)
+
+
+_partitions = None
+
+
+def partitions(cols=None) -> SlotPartitions:
+    """Process-wide partitions, extended in place on ingest and rebuilt if the history was rewritten."""
+    global _partitions
+    cols = history_store.load_columns() if cols is None else cols
+    if _partitions is None or not _partitions.is_prefix_of(cols):
+        _partitions = SlotPartitions.from_columns(cols)
+    else:
+        _partitions.extend(cols)
+    return _partitions
+
+
+def reset():
+    """Drops the process-wide partitions, e.g. after existing draws were corrected."""
+    global _partitions
+    _partitions = None
+
+
+def _predict(parts: SlotPartitions, label: str, n: int, window=None) -> dict:
+    slot = history_store.SLOT_INDEX[label]
+    scores = parts.score(slot, window)
+    best = np.argsort(-scores, kind="stable")[:n]
+    pos, _ = parts.distribution(slot, window)
+    return {
+        "draw_time": DRAW_TIMES[label],
+        "draws_in_slot": parts.sizes[slot],
+        "top_triplets": [f"{code:03d}" for code in best],
+        "hot_digits": {col: int(np.argmax(pos[i])) for i, col in enumerate(history_store.DIGIT_COLUMNS)},
+    }
+
+
+def predict_slots(n: int = 5, cols=None, window=None) -> dict[str, dict]:
+    """
+    Top-n triplets and hot digits for every draw slot, keyed by draw label.
+    Stored in summary.json so readers pick the next draw when they serve it.
+    """
+    parts = partitions(cols)
+    return {label: _predict(parts, label, n, window) for label in draw_calendar.SLOTS}
+
+
+def predict_next(n: int = 5, now: datetime | None = None, cols=None, window=None) -> dict:
+    """Top-n triplets and hot digits for the next draw that is not yet due."""
+    label, scheduled = draw_calendar.calendar().next_due(now or datetime.now(draw_calendar.TZ))
+    return {"draw": label, "date": scheduled.date().isoformat(), **_predict(partitions(cols), label, n, window)}
+
+
+if __name__ == "__main__":
+    prediction = predict_next()
+    print(f"Next draw: {prediction['draw']} {prediction['date']} at {prediction['draw_time']} "
+          f"({prediction['draws_in_slot']} past {prediction['draw']} draws)")
+    print("Top triplets:", ", ".join(prediction["top_triplets"]))
+    print("Hot digits:", prediction["hot_digits"])
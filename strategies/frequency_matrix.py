@@ -1 +1,62 @@
+# strategies/frequency_matrix.py
+"""
+Digit and triplet frequencies over arbitrary windows of the history.
 
+Every window is a slice of the shared index's contiguous arrays, so each
+matrix is a single bincount.
+
+    python -m strategies.frequency_matrix
+"""
+import numpy as np
+
+import history_store
+from strategies import history_index
+
+
+def positional(counts, alpha=1.0) -> np.ndarray:
+    """
+    1000 triplet probabilities from (3, 10) per-position digit counts:
+    smoothed by alpha, normalized per position and multiplied out.
+    """
+    rows = np.asarray(counts) + alpha
+    rows = rows / rows.sum(axis=1, keepdims=True)
+    return (rows[0][:, None, None] * rows[1][None, :, None] * rows[2][None, None, :]).ravel()
+
+
+def smoothed(counts, alpha=1.0) -> np.ndarray:
+    """1000 triplet probabilities from triplet counts, smoothed by alpha."""
+    counts = np.asarray(counts) + alpha
+    return counts / counts.sum()
+
+
+def digit_matrix(index, window=None, end=None) -> np.ndarray:
+    """(3, 10) counts of each digit per position over the last `window` draws before `end`."""
+    digits = index.digits[:, index.window(window, end)]
+    offsets = np.arange(3)[:, None] * 10
+    return np.bincount((digits + offsets).ravel(), minlength=30).reshape(3, 10)
+
+
+def triplet_counts(index, window=None, end=None) -> np.ndarray:
+    """Counts of each triplet 000-999 over the last `window` draws before `end`."""
+    return np.bincount(index.codes[index.window(window, end)], minlength=1000)
+
+
+def windows(index, sizes=(30, 100, 365, None)) -> dict:
+    """Digit matrices for several windows, keyed like stats_engine horizons ("30", ..., "all")."""
+    return {("all" if w is None else str(w)): digit_matrix(index, w) for w in sizes}
+
+
+def score(index, window=100, alpha=1.0) -> np.ndarray:
+    """
+    Probability of each triplet 000-999 as the product of smoothed per-position
+    digit frequencies over the last `window` draws.
+    """
+    return positional(digit_matrix(index, window), alpha)
+
+
+if __name__ == "__main__":
+    index = history_index.shared(history_store.load_columns())
+    for name, matrix in windows(index).items():
+        print(f"Last {name} draws:")
+        for col, row in zip(history_store.DIGIT_COLUMNS, matrix):
+            print(f"  {col}: {row.tolist()}")
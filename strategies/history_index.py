@@ -0,0 +1,164 @@
+# strategies/history_index.py
+"""
+Per-history index shared by the counting strategies.
+
+Built once from the history columns:
+
+* `digits` (3, n) and `codes` (n,) as contiguous arrays, so any window is a
+  slice and its frequencies are one bincount;
+* last-seen draw index for every (position, digit) and every triplet, so
+  "draws since X" is a lookup and "overdue by more than N" is one compare;
+* occurrence lists in CSR form (draw indices grouped by value), so the
+  draws at which a triplet or digit appeared are a slice, without scanning.
+
+Appended draws (extend() for a batch, update() for one) go into arrays
+with spare capacity and update the last-seen arrays in place, so a replay
+applying draws one at a time stays linear; the occurrence lists are
+regrouped lazily the next time they are asked for.
+"""
+import numpy as np
+
+import history_store
+
+
+def reserve(buf: np.ndarray, n: int, extra: int) -> np.ndarray:
+    """buf, or a copy of its first n entries along the last axis with room for n + extra (doubling)."""
+    if n + extra <= buf.shape[-1]:
+        return buf
+    grown = np.empty(buf.shape[:-1] + (max(2 * buf.shape[-1], n + extra),), dtype=buf.dtype)
+    grown[..., :n] = buf[..., :n]
+    return grown
+
+
+def _group(values: np.ndarray, bins: int):
+    """(order, starts): indices of values grouped by value; value v owns order[starts[v]:starts[v + 1]]."""
+    order = np.argsort(values, kind="stable").astype(np.int64)
+    starts = np.zeros(bins + 1, dtype=np.int64)
+    np.cumsum(np.bincount(values, minlength=bins), out=starts[1:])
+    return order, starts
+
+
+class HistoryIndex:
+    def __init__(self, cols):
+        # Buffers may hold spare capacity past self.n; use the digits/codes/slots views.
+        self._digits = np.stack([cols.d1, cols.d2, cols.d3]).astype(np.intp)
+        self._codes = self._digits[0] * 100 + self._digits[1] * 10 + self._digits[2]
+        self._slots = np.asarray(cols.draw, dtype=np.intp)
+        self.n = len(cols)
+        # Content hash of the indexed rows; see history_store.is_prefix. None after update().
+        self.version = history_store.history_version(cols)
+
+        idx = np.arange(self.n)
+        self.digit_last_seen = np.full((3, 10), -1, dtype=np.int64)
+        for pos in range(3):
+            np.maximum.at(self.digit_last_seen[pos], self.digits[pos], idx)
+        self.triplet_last_seen = np.full(1000, -1, dtype=np.int64)
+        np.maximum.at(self.triplet_last_seen, self.codes, idx)
+        self._occurrences = None
+
+    @property
+    def digits(self) -> np.ndarray:
+        return self._digits[:, :self.n]
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self.n]
+
+    @property
+    def slots(self) -> np.ndarray:
+        return self._slots[:self.n]
+
+    def _append(self, digits: np.ndarray, slots: np.ndarray):
+        """Appends (3, m) digits and their m slots after the indexed draws."""
+        m = len(slots)
+        codes = digits[0] * 100 + digits[1] * 10 + digits[2]
+        idx = np.arange(self.n, self.n + m)
+        for pos in range(3):
+            self.digit_last_seen[pos, digits[pos]] = idx
+        self.triplet_last_seen[codes] = idx
+        self._digits = reserve(self._digits, self.n, m)
+        self._codes = reserve(self._codes, self.n, m)
+        self._slots = reserve(self._slots, self.n, m)
+        self._digits[:, self.n:self.n + m] = digits
+        self._codes[self.n:self.n + m] = codes
+        self._slots[self.n:self.n + m] = slots
+        self.n += m
+        self._occurrences = None
+
+    def extend(self, cols):
+        """Applies the rows of cols after the first self.n (cols must extend the indexed history)."""
+        if len(cols) <= self.n:
+            return
+        new = cols.take(slice(self.n, None))
+        self._append(np.stack([new.d1, new.d2, new.d3]).astype(np.intp), np.asarray(new.draw, dtype=np.intp))
+        self.version = history_store.history_version(cols)
+
+    def update(self, date_ordinal, slot, d1, d2, d3):
+        """Applies one draw appended after everything already indexed."""
+        n, code = self.n, d1 * 100 + d2 * 10 + d3
+        if n == len(self._codes):
+            self._digits = reserve(self._digits, n, 1)
+            self._codes = reserve(self._codes, n, 1)
+            self._slots = reserve(self._slots, n, 1)
+        self._digits[:, n] = (d1, d2, d3)
+        self._codes[n] = code
+        self._slots[n] = slot
+        self.digit_last_seen[(0, 1, 2), (d1, d2, d3)] = n
+        self.triplet_last_seen[code] = n
+        self.n = n + 1
+        self._occurrences = None
+        # Only one row is known here, not the history it extends.
+        self.version = None
+
+    def is_prefix_of(self, cols) -> bool:
+        return history_store.is_prefix(self.n, self.version, cols)
+
+    def window(self, window=None, end=None) -> slice:
+        """Slice of the `window` draws ending before draw index `end` (default: all draws up to now)."""
+        end = self.n if end is None else end
+        return slice(0 if window is None else max(end - window, 0), end)
+
+    def _grouped(self):
+        if self._occurrences is None:
+            self._occurrences = {
+                "triplet": _group(self.codes, 1000),
+                "digit": [_group(self.digits[pos], 10) for pos in range(3)],
+            }
+        return self._occurrences
+
+    def triplet_occurrences(self, code: int) -> np.ndarray:
+        """Ascending draw indices at which triplet `code` was drawn."""
+        order, starts = self._grouped()["triplet"]
+        return order[starts[code]:starts[code + 1]]
+
+    def digit_occurrences(self, pos: int, digit: int) -> np.ndarray:
+        order, starts = self._grouped()["digit"][pos]
+        return order[starts[digit]:starts[digit + 1]]
+
+    def grouped(self, kind: str = "triplet", pos: int = 0):
+        """Raw (order, starts) occurrence lists for all triplets, or for the digits of one position."""
+        groups = self._grouped()[kind]
+        return groups if kind == "triplet" else groups[pos]
+
+
+_shared = None
+
+
+def shared(cols=None) -> HistoryIndex:
+    """
+    One index per process, extended in place when the history grew and
+    rebuilt when it was rewritten.
+    """
+    global _shared
+    cols = history_store.load_columns() if cols is None else cols
+    if _shared is None or not _shared.is_prefix_of(cols):
+        _shared = HistoryIndex(cols)
+    else:
+        _shared.extend(cols)
+    return _shared
+
+
+def reset():
+    """Drops the shared index, e.g. after existing draws were corrected."""
+    global _shared
+    _shared = None
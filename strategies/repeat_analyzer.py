@@ -1 +1,93 @@
+# strategies/repeat_analyzer.py
+"""
+Gaps since last seen and repeat intervals for every digit and triplet.
 
+"Draws since 777 last appeared" is a lookup in the shared index's last-seen
+array; "all triplets overdue by more than N draws" is one comparison over
+1000 gaps. Repeat intervals come from the index's grouped occurrence lists.
+
+    python -m strategies.repeat_analyzer --overdue 2000
+"""
+import argparse
+
+import numpy as np
+
+import history_store
+from strategies import history_index
+
+
+def triplet_gaps(index) -> np.ndarray:
+    """Draws since each triplet 000-999 last appeared; never-seen triplets get index.n."""
+    return np.where(index.triplet_last_seen >= 0, index.n - 1 - index.triplet_last_seen, index.n)
+
+
+def digit_gaps(index) -> np.ndarray:
+    """(3, 10) draws since each digit last appeared at each position."""
+    return np.where(index.digit_last_seen >= 0, index.n - 1 - index.digit_last_seen, index.n)
+
+
+def draws_since(index, triplet) -> int:
+    """Draws since `triplet` ("777" or 777) last appeared, 0 if it was the latest draw."""
+    return int(triplet_gaps(index)[int(triplet)])
+
+
+def overdue(index, min_gap: int) -> list[tuple[str, int]]:
+    """[("123", gap), ...] for every triplet unseen for more than min_gap draws, longest gap first."""
+    gaps = triplet_gaps(index)
+    codes = np.flatnonzero(gaps > min_gap)
+    codes = codes[np.argsort(-gaps[codes], kind="stable")]
+    return [(f"{code:03d}", int(gaps[code])) for code in codes]
+
+
+def repeat_intervals(index, triplet) -> np.ndarray:
+    """Draw counts between consecutive appearances of `triplet`."""
+    return np.diff(index.triplet_occurrences(int(triplet)))
+
+
+def _interval_histogram(order, starts, bins) -> np.ndarray:
+    steps = np.diff(order)
+    # Drop the step from one value's last occurrence to the next value's first.
+    same_value = np.ones(len(steps), dtype=bool)
+    boundaries = starts[1:-1] - 1
+    same_value[boundaries[(boundaries >= 0) & (boundaries < len(steps))]] = False
+    return np.bincount(steps[same_value], minlength=bins)
+
+
+def interval_distribution(index, kind="triplet", pos=0) -> np.ndarray:
+    """
+    Histogram of repeat intervals over all triplets (or over the digits of
+    one position): result[k] is how often a value reappeared after k draws.
+    """
+    order, starts = index.grouped(kind, pos)
+    return _interval_histogram(order, starts, index.n)
+
+
+def score(index) -> np.ndarray:
+    """Probability-like weights for each triplet 000-999, proportional to how overdue it is."""
+    gaps = triplet_gaps(index).astype(np.float64) + 1
+    return gaps / gaps.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cash3 gap and repeat statistics.")
+    parser.add_argument("--triplet", "-t", help="Report gap and repeat intervals for one triplet, e.g. 777.")
+    parser.add_argument("--overdue", "-o", type=int, help="List triplets unseen for more than N draws.")
+    args = parser.parse_args()
+
+    index = history_index.shared(history_store.load_columns())
+    if args.triplet:
+        intervals = repeat_intervals(index, args.triplet)
+        print(f"{args.triplet}: {draws_since(index, args.triplet)} draws since last seen, "
+              f"{len(index.triplet_occurrences(int(args.triplet)))} appearances")
+        if len(intervals):
+            print(f"  repeat interval mean {intervals.mean():.1f}, min {intervals.min()}, max {intervals.max()}")
+    if args.overdue is not None:
+        rows = overdue(index, args.overdue)
+        print(f"{len(rows)} triplets overdue by more than {args.overdue} draws:")
+        print(", ".join(f"{code} ({gap})" for code, gap in rows[:50]))
+    if not args.triplet and args.overdue is None:
+        print("Digit gaps:", digit_gaps(index).tolist())
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,188 @@
+# strategies/transition_matrix.py
+"""
+Draw-to-draw transition counts, Midday -> Evening -> Night -> next Midday.
 
+Two kinds of transitions are counted for each target draw slot:
+
+* digit transitions per position: a dense (slot, position, from, to)
+  array of 3 x 3 x 10 x 10 counts;
+* triplet transitions: the 1000 x 1000 matrix per slot is almost empty, so
+  it is stored as sorted int64 keys (slot * 10**6 + from * 1000 + to) with
+  a parallel count array. Single draws applied by update() go to a dict
+  first, so each costs O(1); extend() and compact() fold them in.
+
+Only pairs of draws that are actually consecutive in the schedule are
+counted, so a gap in the history never produces a bogus transition.
+score() returns a probability for each of the 1000 candidate triplets.
+
+    python -m strategies.transition_matrix
+"""
+import numpy as np
+
+import history_store
+from strategies import frequency_matrix
+
+N_SLOTS = len(history_store.DRAW_SLOTS)
+_SLOT_STRIDE = 1_000_000
+
+
+def _codes(cols) -> np.ndarray:
+    return (np.asarray(cols.d1, dtype=np.int64) * 100
+            + np.asarray(cols.d2, dtype=np.int64) * 10
+            + np.asarray(cols.d3, dtype=np.int64))
+
+
+def _consecutive(prev_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """True where keys[i] is the scheduled draw right after prev_keys[i] (see history_store.slot_keys)."""
+    last_slot = N_SLOTS - 1
+    step = keys - prev_keys
+    return (step == 1) | ((step == 4 - last_slot) & (prev_keys % 4 == last_slot))
+
+
+class TransitionMatrix:
+    def __init__(self):
+        self.n = 0
+        # (date ordinal, slot) and triplet code of the last applied draw
+        self.last_key = (-1, -1)
+        self.last_code = -1
+        # Content hash of the applied rows (see history_store.is_prefix); None after update().
+        self.version = None
+        self.digit_counts = np.zeros((N_SLOTS, 3, 10, 10), dtype=np.int64)
+        self.triplet_keys = np.empty(0, dtype=np.int64)
+        self.triplet_counts = np.empty(0, dtype=np.int64)
+        # Triplet transitions from update() not yet in the arrays: {(slot, from): {to: count}}.
+        self.pending = {}
+
+    def _add_pairs(self, slots, prev_codes, codes):
+        """Counts a batch of (target slot, previous triplet, triplet) transitions."""
+        if not len(codes):
+            return
+        prev_digits = np.stack([prev_codes // 100, prev_codes // 10 % 10, prev_codes % 10])
+        digits = np.stack([codes // 100, codes // 10 % 10, codes % 10])
+        for pos in range(3):
+            flat = (slots * 10 + prev_digits[pos]) * 10 + digits[pos]
+            self.digit_counts[:, pos] += np.bincount(flat, minlength=N_SLOTS * 100).reshape(N_SLOTS, 10, 10)
+
+        self._merge(slots * _SLOT_STRIDE + prev_codes * 1000 + codes, np.ones(len(codes), dtype=np.int64))
+
+    def _merge(self, keys, weights):
+        keys = np.concatenate([self.triplet_keys, keys])
+        weights = np.concatenate([self.triplet_counts, weights])
+        self.triplet_keys, inverse = np.unique(keys, return_inverse=True)
+        self.triplet_counts = np.bincount(inverse, weights=weights).astype(np.int64)
+
+    def compact(self):
+        """Folds the triplet transitions applied by update() into the sorted arrays."""
+        if not self.pending:
+            return
+        keys, weights = [], []
+        for (slot, prev), row in self.pending.items():
+            for code, count in row.items():
+                keys.append(slot * _SLOT_STRIDE + prev * 1000 + code)
+                weights.append(count)
+        self.pending = {}
+        self._merge(np.array(keys, dtype=np.int64), np.array(weights, dtype=np.int64))
+
+    def extend(self, cols):
+        """
+        Applies the rows of cols after the first self.n in one pass. cols
+        must extend the history this matrix was built from (see
+        is_prefix_of); use from_columns() otherwise.
+        """
+        self.compact()
+        # Start at the last applied draw so it pairs with the first new one.
+        start = max(self.n - 1, 0)
+        keys = history_store.slot_keys(cols)[start:]
+        codes = _codes(cols)[start:]
+        if len(codes) >= 2:
+            ok = _consecutive(keys[:-1], keys[1:])
+            self._add_pairs(keys[1:][ok] % 4, codes[:-1][ok], codes[1:][ok])
+        self.n = len(cols)
+        self.version = history_store.history_version(cols)
+        if self.n:
+            self.last_key = (int(cols.date[-1]), int(cols.draw[-1]))
+            self.last_code = int(codes[-1])
+
+    def update(self, date_ordinal, slot, d1, d2, d3):
+        """Applies one draw appended after everything already counted."""
+        code = d1 * 100 + d2 * 10 + d3
+        if self.n and _consecutive(np.array([self.last_key[0] * 4 + self.last_key[1]]),
+                                   np.array([date_ordinal * 4 + slot]))[0]:
+            prev = self.last_code
+            for pos, (a, b) in enumerate(zip((prev // 100, prev // 10 % 10, prev % 10), (d1, d2, d3))):
+                self.digit_counts[slot, pos, a, b] += 1
+            row = self.pending.setdefault((slot, prev), {})
+            row[code] = row.get(code, 0) + 1
+        self.n += 1
+        self.last_key = (int(date_ordinal), int(slot))
+        self.last_code = int(code)
+        # Only one row is known here, not the history it extends.
+        self.version = None
+
+    @classmethod
+    def from_columns(cls, cols):
+        """Full recomputation from history columns in a single vectorized pass."""
+        matrix = cls()
+        matrix.extend(cols)
+        return matrix
+
+    def is_prefix_of(self, cols) -> bool:
+        """True if the matrix was built from the first self.n rows of cols."""
+        return history_store.is_prefix(self.n, self.version, cols)
+
+    def digit_matrix(self, slot: int, pos: int) -> np.ndarray:
+        """10 x 10 counts of digit at `pos` in one draw -> the next draw, for draws in `slot`."""
+        return self.digit_counts[slot, pos]
+
+    def triplet_row(self, slot: int, prev_code: int):
+        """(next codes, counts) observed after prev_code, for draws in `slot`."""
+        base = slot * _SLOT_STRIDE + prev_code * 1000
+        lo, hi = np.searchsorted(self.triplet_keys, [base, base + 1000])
+        codes, counts = self.triplet_keys[lo:hi] - base, self.triplet_counts[lo:hi]
+        extra = self.pending.get((slot, prev_code))
+        if extra:
+            codes = np.concatenate([codes, np.fromiter(extra, dtype=np.int64, count=len(extra))])
+            counts = np.concatenate([counts, np.fromiter(extra.values(), dtype=np.int64, count=len(extra))])
+            codes, inverse = np.unique(codes, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        return codes, counts
+
+    def next_slot(self) -> int:
+        return (self.last_key[1] + 1) % N_SLOTS if self.n else 0
+
+    def score(self, slot=None, prev_code=None, alpha=1.0, triplet_weight=0.5) -> np.ndarray:
+        """
+        Probability of each triplet 000-999 for the draw in `slot` following
+        `prev_code` (defaults: the draw after the last one applied). Blends
+        the product of the three smoothed positional digit transitions with
+        the smoothed triplet transition row.
+        """
+        slot = self.next_slot() if slot is None else slot
+        prev_code = self.last_code if prev_code is None else prev_code
+        if prev_code < 0:
+            return np.full(1000, 1 / 1000)
+
+        prev = (prev_code // 100, prev_code // 10 % 10, prev_code % 10)
+        positional = frequency_matrix.positional(self.digit_counts[slot, np.arange(3), prev, :], alpha)
+
+        codes, counts = self.triplet_row(slot, prev_code)
+        triplet = np.zeros(1000, dtype=np.int64)
+        triplet[codes] = counts
+        triplet = frequency_matrix.smoothed(triplet, alpha)
+        return (1 - triplet_weight) * positional + triplet_weight * triplet
+
+
+def top(scores: np.ndarray, n: int = 10):
+    """[("790", score), ...] for the n best-scoring triplets."""
+    best = np.argsort(-scores, kind="stable")[:n]
+    return [(f"{code:03d}", float(scores[code])) for code in best]
+
+
+if __name__ == "__main__":
+    matrix = TransitionMatrix.from_columns(history_store.load_columns())
+    if not matrix.n:
+        raise SystemExit("No history available.")
+    slot = matrix.next_slot()
+    print(f"Transitions counted: {int(matrix.triplet_counts.sum())} "
+          f"({len(matrix.triplet_keys)} distinct triplet pairs)")
+    print(f"Next {history_store.DRAW_SLOTS[slot]} after {matrix.last_code:03d}:", top(matrix.score(slot)))
@@ -0,0 +1,34 @@
+# tests/test_dashboard.py
+"""The predicted next draw follows the clock, not the last summary rebuild or publish."""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import data_store
+import draw_calendar
+from config import DRAW_SCHEDULE, GRACE
+
+SUMMARY = {"next_draws": {label: {"top_triplets": [label]} for label in draw_calendar.SLOTS}}
+
+
+def test_next_draw_moves_on_when_a_draw_comes_due():
+    due = datetime.combine(date(2026, 3, 4), DRAW_SCHEDULE["Evening"], tzinfo=draw_calendar.TZ) + GRACE
+    before = data_store.next_draw(SUMMARY, now=due - timedelta(minutes=1))
+    after = data_store.next_draw(SUMMARY, now=due + timedelta(minutes=1))
+    assert (before["draw"], before["date"], before["top_triplets"]) == ("Evening", "2026-03-04", ["Evening"])
+    assert (after["draw"], after["date"], after["top_triplets"]) == ("Night", "2026-03-04", ["Night"])
+    assert data_store.next_draw({}) == {}
+
+
+def test_artifacts_expire_when_their_next_draw_comes_due(tmp_path, monkeypatch):
+    dashboard = pytest.importorskip("dashboard")
+    source = tmp_path / "summary.json"
+    source.write_text("{}")
+    manifest = {
+        "sources": {str(source): list(data_store.file_signature(source))},
+        "next_due": dashboard._next_due(),
+        "files": {},
+    }
+    assert dashboard.is_current(manifest)
+    monkeypatch.setattr(dashboard, "_next_due", lambda: "2099-01-01T12:20:00-05:00")
+    assert not dashboard.is_current(manifest)
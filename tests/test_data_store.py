@@ -0,0 +1,43 @@
+# tests/test_data_store.py
+"""History queries over the columns must match filtering the full list of rows."""
+import pytest
+
+import data_store
+import history_store
+from benchmarks.synthetic import synthetic_columns
+
+COLS = synthetic_columns(2000, seed=12)
+ROWS = history_store.columns_to_records(COLS)
+
+
+def expected(offset=0, limit=50, draw=None, start=None, end=None):
+    rows = [r for r in ROWS
+            if (draw is None or r["Draw"] == draw)
+            and (start is None or r["Date"] >= start)
+            and (end is None or r["Date"] <= end)]
+    return rows[::-1][offset:offset + limit], len(rows)
+
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"offset": 37, "limit": 11},
+    {"draw": "Night"},
+    {"draw": "Evening", "offset": 5, "limit": 7},
+    {"start": "1990-06-01", "end": "1991-01-31", "limit": 500},
+    {"draw": "Midday", "start": "1990-06-01", "end": "1990-07-15", "offset": 3},
+    {"draw": "Bogus"},
+    {"offset": 10**6},
+    {"start": "2030-01-01"},
+    {"end": "1990-01-01"},
+])
+def test_query_matches_row_filter(query):
+    assert data_store.HistorySnapshot(COLS).query(**query) == expected(**query)
+
+
+def test_latest_and_empty():
+    snapshot = data_store.HistorySnapshot(COLS)
+    assert snapshot.total_draws == len(ROWS)
+    assert snapshot.latest == ROWS[-1]
+    assert snapshot.recent(3) == ROWS[-1:-4:-1]
+    empty = data_store.HistorySnapshot()
+    assert empty.latest is None and empty.query() == ([], 0)
@@ -0,0 +1,35 @@
+# tests/test_ensemble.py
+"""Ensemble runs share one history index and reject malformed weight overrides."""
+import sys
+
+import pytest
+
+import ensemble_predictor
+from benchmarks.synthetic import synthetic_columns
+from strategies import history_index
+
+
+def test_indexed_strategies_share_one_index(monkeypatch):
+    built = []
+
+    class CountingIndex(history_index.HistoryIndex):
+        def __init__(self, cols):
+            built.append(len(cols))
+            super().__init__(cols)
+
+    monkeypatch.setattr(history_index, "HistoryIndex", CountingIndex)
+    monkeypatch.setattr(history_index, "_shared", None)
+    cols = synthetic_columns(500, seed=5)
+    result = ensemble_predictor.run(cols=cols, names=["frequency", "repeat"],
+                                    cache=ensemble_predictor.ScoreCache(None))
+    assert built == [500]
+    assert sorted(result["timings"]) == ["frequency", "repeat"]
+
+
+@pytest.mark.parametrize("weight", ["transition", "typo=2", "transition=heavy"])
+def test_bad_weight_is_a_usage_error(monkeypatch, capsys, weight):
+    monkeypatch.setattr(sys, "argv", ["ensemble_predictor.py", "--weight", weight])
+    with pytest.raises(SystemExit) as exc:
+        ensemble_predictor.main()
+    assert exc.value.code == 2
+    assert "--weight" in capsys.readouterr().err
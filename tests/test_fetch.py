@@ -0,0 +1,77 @@
+# tests/test_fetch.py
+"""Source racing against the local stand-in server: failover, slow sources and timeouts."""
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("pdfplumber")
+
+import async_fetch
+import parsers
+from benchmarks.standin_server import Route, serve
+from benchmarks.synthetic import results_html, synthetic_columns, write_winning_numbers_pdf
+
+N_DRAWS = 90
+
+
+@pytest.fixture(scope="module")
+def bodies(tmp_path_factory):
+    cols = synthetic_columns(N_DRAWS, seed=7)
+    path = tmp_path_factory.mktemp("fetch") / "winning.pdf"
+    write_winning_numbers_pdf(path, cols)
+    return results_html(cols), path.read_bytes()
+
+
+def sources(base, timeout):
+    return [
+        async_fetch.Source("html", f"{base}/cash3.html", parsers.parse_results_html,
+                           timeout=timeout, backoff=0.1),
+        async_fetch.Source("pdf", f"{base}/winning.pdf", parsers.parse_pdf_bytes,
+                           timeout=timeout, backoff=0.1, cpu_bound=True),
+    ]
+
+
+def race(bodies, html_kw, pdf_kw, timeout=5.0, accept=None):
+    html, pdf = bodies
+    routes = {
+        "/cash3.html": Route(html, **html_kw),
+        "/winning.pdf": Route(pdf, "application/pdf", **pdf_kw),
+    }
+    with serve(routes) as base:
+        started = time.perf_counter()
+        winner, rows = asyncio.run(async_fetch.race(sources(base, timeout), accept=accept))
+        return winner, rows, time.perf_counter() - started
+
+
+@pytest.mark.parametrize("html_kw, pdf_kw, expected", [
+    ({}, {"latency": 0.3}, "html"),                          # both healthy
+    ({"latency": 2.0}, {"latency": 0.2}, "pdf"),             # slow html
+    ({"fail_first": 99}, {"latency": 0.2}, "pdf"),           # html down
+    ({"fail_first": 1}, {"latency": 1.5}, "html"),           # html flaky once, retried
+], ids=["healthy", "slow-html", "html-down", "html-flaky"])
+def test_first_good_source_wins(bodies, html_kw, pdf_kw, expected):
+    winner, rows, _ = race(bodies, html_kw, pdf_kw)
+    assert winner == expected
+    assert len(rows) == N_DRAWS
+
+
+def test_slow_source_does_not_hold_up_the_winner(bodies):
+    winner, _, elapsed = race(bodies, {"latency": 3.0}, {"latency": 0.2})
+    assert winner == "pdf"
+    assert elapsed < 2.0
+
+
+def test_rejected_rows_fail_over(bodies):
+    html, pdf = bodies
+    stale = (results_html(synthetic_columns(N_DRAWS - 1, seed=7)), pdf)
+    winner, rows, _ = race(stale, {}, {"latency": 0.3}, accept=lambda rows: len(rows) == N_DRAWS)
+    assert winner == "pdf"
+    assert len(rows) == N_DRAWS
+
+
+def test_every_source_timing_out_gives_nothing(bodies):
+    winner, rows, elapsed = race(bodies, {"latency": 10.0}, {"fail_first": 99}, timeout=1.0)
+    assert (winner, rows) == (None, [])
+    assert elapsed < 3.0
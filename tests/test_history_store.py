@@ -0,0 +1,98 @@
+# tests/test_history_store.py
+"""Columnar store publishing (one consistent version per reader, readers never write) and CSV appends."""
+import numpy as np
+
+import history_store
+from benchmarks.synthetic import synthetic_columns
+
+
+def _paths(tmp_path):
+    return tmp_path / "history.csv", tmp_path / "columns"
+
+
+def _versions(directory):
+    return sorted(p.name for p in directory.iterdir() if p.is_dir())
+
+
+def _same(a, b):
+    return all(np.array_equal(getattr(a, name), getattr(b, name)) for name in history_store.COLUMN_DTYPES)
+
+
+def test_write_publishes_one_version(tmp_path):
+    csv_path, directory = _paths(tmp_path)
+    cols = synthetic_columns(300, seed=1)
+    history_store.write_history(history_store.columns_to_frame(cols), csv_path, directory)
+    name = (directory / history_store.CURRENT_POINTER).read_text()
+    assert _versions(directory) == [name]
+    assert _same(history_store.load_columns(directory, csv_path), cols)
+
+
+def test_superseded_versions_are_pruned_and_mapped_ones_stay_readable(tmp_path):
+    csv_path, directory = _paths(tmp_path)
+    cols = synthetic_columns(300, seed=2)
+    frame = history_store.columns_to_frame(cols)
+    history_store.write_history(frame.iloc[:100], csv_path, directory)
+    first = history_store.load_columns(directory, csv_path)
+    history_store.append_draws(frame.iloc[100:200], csv_path, directory)
+    history_store.append_draws(frame.iloc[200:], csv_path, directory)
+    assert len(_versions(directory)) == 2
+    assert _same(first, cols.take(slice(0, 100)))
+    assert _same(history_store.load_columns(directory, csv_path), cols)
+
+
+def test_stale_store_reads_csv_without_writing(tmp_path):
+    csv_path, directory = _paths(tmp_path)
+    cols = synthetic_columns(300, seed=3)
+    frame = history_store.columns_to_frame(cols)
+    history_store.write_history(frame.iloc[:200], csv_path, directory)
+    published = (directory / history_store.CURRENT_POINTER).read_text()
+    # Another process appended to the CSV and has not published its columns yet.
+    history_store.append_csv_rows(csv_path, frame.iloc[200:])
+
+    assert _same(history_store.load_columns(directory, csv_path), cols)
+    assert (directory / history_store.CURRENT_POINTER).read_text() == published
+
+    history_store.refresh_columns(directory, csv_path)
+    assert (directory / history_store.CURRENT_POINTER).read_text() != published
+    assert _same(history_store.load_columns(directory, csv_path), cols)
+
+
+def test_missing_store_and_csv_is_empty(tmp_path):
+    csv_path, directory = _paths(tmp_path)
+    assert len(history_store.load_columns(directory, csv_path)) == 0
+    assert not directory.exists()
+
+
+def test_append_csv_rows_adds_new_columns(tmp_path):
+    import pandas as pd
+
+    path = tmp_path / "log.csv"
+    history_store.append_csv_rows(path, pd.DataFrame([{"draw": "Midday", "box30_a": 0.1}]))
+    history_store.append_csv_rows(path, pd.DataFrame([{"draw": "Evening", "box30_a": 0.2}]))
+    history_store.append_csv_rows(path, pd.DataFrame([{"draw": "Night", "box30_a": 0.3, "box30_b": 0.5}]))
+    history_store.append_csv_rows(path, pd.DataFrame([{"draw": "Midday", "box30_b": 0.4}]))
+    assert path.read_text().splitlines() == [
+        "draw,box30_a,box30_b",
+        "Midday,0.1,",
+        "Evening,0.2,",
+        "Night,0.3,0.5",
+        "Midday,,0.4",
+    ]
+
+
+def test_appends_chain_the_version_and_corrections_reset_it(tmp_path):
+    csv_path, directory = _paths(tmp_path)
+    frame = history_store.columns_to_frame(synthetic_columns(300, seed=4))
+    history_store.write_history(frame.iloc[:200], csv_path, directory)
+    base = history_store.load_columns(directory, csv_path)
+    history_store.append_draws(frame.iloc[200:], csv_path, directory)
+    cols = history_store.load_columns(directory, csv_path)
+    assert [rows for rows, _ in cols.chain] == [200, 300]
+    assert history_store.is_prefix(200, history_store.history_version(base), cols)
+
+    fix = frame.iloc[[10]].copy()
+    fix["Digit1"] = (fix["Digit1"] + 1) % 10
+    history_store.apply_corrections(fix, csv_path, directory)
+    fixed = history_store.load_columns(directory, csv_path)
+    assert [rows for rows, _ in fixed.chain] == [300]
+    assert not history_store.is_prefix(200, history_store.history_version(base), fixed)
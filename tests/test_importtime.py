@@ -0,0 +1,10 @@
+# tests/test_importtime.py
+"""Cold-start guard: the entry points must stay within budget and keep heavy libraries lazy."""
+import pytest
+
+from benchmarks import check_importtime
+
+
+@pytest.mark.parametrize("module", sorted(check_importtime.FORBIDDEN))
+def test_import_within_budget(module):
+    assert check_importtime.check(module) == []
@@ -0,0 +1,123 @@
+# tests/test_parsers.py
+"""
+The optional HTML backends must produce exactly the stdlib backend's rows,
+and PDFs must parse page by page with the same rows as reading them whole.
+"""
+import io
+import logging
+import tracemalloc
+
+import pytest
+
+import history_store
+import metrics
+import parsers
+from benchmarks.synthetic import results_html, synthetic_columns, write_winning_numbers_pdf
+
+EDGE_CASES = """<html><body>
+<table class="other"><tbody><tr><td>01/01/2020</td><td>Midday</td><td>1 2 3</td></tr></tbody></table>
+<table class="results big"><thead><tr><td>01/02/2020</td><td>Midday</td><td>9 9 9</td></tr></thead>
+<tbody>
+<tr><td> 07/25/2025 </td><td>Night</td><td><span>3</span> <span>7</span> <span>7</span></td><td>x</td></tr>
+<tr><td>bad date</td><td>Night</td><td>1 2 3</td></tr>
+<tr><td>07/26/2025</td><td>Evening &amp; more</td><td>1 2</td></tr>
+<tr><td>07/27/2025</td><td>MIDDAY</td><td>4 5 6</td></tr>
+<tr><td>07/28/2025</td></tr>
+</tbody></table>
+<table><tbody><tr><td>07/29/2025</td><td>Night</td><td>1 1 1</td></tr></tbody></table>
+</body></html>"""
+
+PAGES = {
+    "synthetic": results_html(synthetic_columns(500, seed=3)),
+    "edge_cases": EDGE_CASES,
+}
+
+OPTIONAL = {"lxml": "lxml", "selectolax": "selectolax.lexbor"}
+
+
+@pytest.fixture(params=sorted(OPTIONAL))
+def backend(request):
+    pytest.importorskip(OPTIONAL[request.param])
+    return request.param
+
+
+@pytest.mark.parametrize("page", sorted(PAGES))
+def test_backend_matches_stdlib(backend, page):
+    html = PAGES[page]
+    expected = list(parsers.iter_results_html(html, "stdlib"))
+    assert expected, "fixture page has no parsable rows"
+    assert list(parsers.iter_results_html(html, backend)) == expected
+    assert list(parsers.iter_results_html(html.encode(), backend)) == expected
+
+
+@pytest.mark.parametrize("name", ["stdlib", "lxml", "selectolax"])
+def test_chunked_file_matches_string(name, monkeypatch):
+    if name in OPTIONAL:
+        pytest.importorskip(OPTIONAL[name])
+    html = PAGES["synthetic"]
+    # Small chunks split tags and rows across feed() calls.
+    monkeypatch.setattr(parsers, "CHUNK_SIZE", 97)
+    streamed = list(parsers.iter_results_html(io.BytesIO(html.encode()), name))
+    assert streamed == list(parsers.iter_results_html(html, "stdlib"))
+    assert len(streamed) == 500
+
+
+def test_default_backend_streams(monkeypatch):
+    monkeypatch.delenv("CASH3_HTML_BACKEND", raising=False)
+    assert parsers.html_backend() in ("lxml", "stdlib")
+    monkeypatch.setenv("CASH3_HTML_BACKEND", "selectolax")
+    assert parsers.html_backend() == "selectolax"
+    monkeypatch.setenv("CASH3_HTML_BACKEND", "bs4")
+    with pytest.raises(ValueError):
+        parsers.html_backend()
+
+
+def test_unparsable_rows_are_counted_not_printed(monkeypatch, capsys, caplog):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    skipped = parsers.SKIPPED_ROWS.values.get((("format", "html"),), 0)
+    with caplog.at_level(logging.DEBUG, logger="parsers"):
+        rows = list(parsers.iter_results_html(EDGE_CASES, "stdlib"))
+    assert [row["Date"] for row in rows] == ["2025-07-25", "2025-07-27"]
+    assert parsers.SKIPPED_ROWS.values[(("format", "html"),)] == skipped + 1
+    assert "bad date" in caplog.text
+    assert capsys.readouterr().out == ""
+
+
+def _write_pdf(directory, pages, rows_per_page=45):
+    cols = synthetic_columns(pages * rows_per_page, seed=pages)
+    path = directory / f"winning_{pages}.pdf"
+    write_winning_numbers_pdf(path, cols, rows_per_page=rows_per_page)
+    return path, cols
+
+
+def test_pdf_rows_match_whole_document_parse(tmp_path):
+    pdfplumber = pytest.importorskip("pdfplumber")
+    path, cols = _write_pdf(tmp_path, pages=5)
+    rows = list(parsers.iter_pdf_rows(path))
+
+    # The pre-streaming parser: all page text joined, then split into lines.
+    with pdfplumber.open(path) as pdf:
+        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+    assert rows == parsers.parse_pdf_lines(text.splitlines())
+
+    assert len(rows) == len(cols)
+    expected = history_store.columns_to_records(cols)[::-1]
+    assert [(r["Date"], r["Draw"], r["Digit1"], r["Digit2"], r["Digit3"]) for r in rows] == [
+        (r["Date"], r["Draw"], r["Digit1"], r["Digit2"], r["Digit3"]) for r in expected
+    ]
+    assert parsers.parse_pdf_bytes(path.read_bytes()) == rows
+
+
+def test_pdf_memory_does_not_grow_with_page_count(tmp_path):
+    pytest.importorskip("pdfplumber")
+    peaks = {}
+    for pages in (2, 6):
+        path, _ = _write_pdf(tmp_path, pages)
+        tracemalloc.start()
+        try:
+            assert sum(1 for _ in parsers.iter_pdf_rows(path)) == pages * 45
+            peaks[pages] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    # Reading whole documents grows ~4 MB per page here; streaming stays within a page or so.
+    assert peaks[6] < peaks[2] * 1.3, peaks
@@ -1,15 +1,17 @@
 # update_predictions.py
 
-import pandas as pd
-from predictions import predict_next_numbers, evaluate_accuracy
 import json
 from datetime import datetime
+from pathlib import Path
 
-# Load data
-df = pd.read_csv("ga_cash3_history_cleaned.csv")
-df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d', errors='coerce')
-df = df.dropna(subset=["Date", "Digit1", "Digit2", "Digit3"])
-df = df.sort_values(by="Date")
+import pandas as pd
+
+import normalize
+from history_store import HISTORY_PATH, append_csv_rows
+from predictions import predict_next_numbers, evaluate_accuracy
+
+# Load data (typed, already sorted by date and draw)
+df = normalize.read_history(HISTORY_PATH)
 
 # Predict next
 prediction = predict_next_numbers(df)
@@ -21,4 +23,11 @@ accuracy = evaluate_accuracy(df, 30)
 with open("data/latest_accuracy.json", "w") as f:
     json.dump(accuracy, f)
 
+append_csv_rows(Path("data/prediction_log.csv"), pd.DataFrame([{
+    "generated_at": prediction["generated_at"],
+    "draw": prediction["draw"],
+    "top_triplets": " ".join(prediction["top_triplets"]),
+    **{f"box30_{label}": stats["box"] for label, stats in accuracy.items()},
+}]))
+
 print(f"[{datetime.now()}] ✅ Prediction + accuracy updated.")